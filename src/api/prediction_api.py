@@ -1,11 +1,18 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import pandas as pd
 import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import logging
 from datetime import datetime
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Tuple, Union
 
 # Configure logging
 logging.basicConfig(
@@ -18,29 +25,147 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / 'data'
 
+# Shared modules live alongside prediction.py in src/
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from frame_cache import frame_cache
+from columnar_store import dataset_source, dataset_bytes, load_frame
+from dataset_manifest import DatasetManifest
+from history_index import DateIndexCache, HISTORY_FORMATS, iter_records
+from parallel import parallel_map, resolve_workers
+from instrumentation import MetricsRegistry, SamplingProfiler
+from model_registry import ModelRegistry
+from prediction_service import PredictionService
+from response_encoding import JSON_MIMETYPE, compress, encode, is_default_view, negotiate, paginate, parse_view, select_fields
+
+# Worker processes used by /analyze; 1 keeps the analysis in-process. Datasets
+# are always loaded in this process, through the frame cache
+ANALYZE_WORKERS = int(os.environ.get('ANALYZE_WORKERS', 1))
+
+# Threads used to load (and, when ANALYZE_WORKERS is 1, analyze) tickers concurrently
+ANALYZE_IO_THREADS = int(os.environ.get('ANALYZE_IO_THREADS', 4))
+
+# Most tickers accepted by one /predict call
+PREDICT_MAX_TICKERS = int(os.environ.get('PREDICT_MAX_TICKERS', 1000))
+
+# How often the background thread checks the data directory for changes
+ANALYZE_REFRESH_SECONDS = float(os.environ.get('ANALYZE_REFRESH_SECONDS', 5))
+
+# Negotiated /analyze and /datasets bodies at least this large are gzip/br compressed
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Rows serialized per chunk of a streamed /history response
+HISTORY_CHUNK_ROWS = int(os.environ.get('HISTORY_CHUNK_ROWS', 500))
+
+# How often the dataset manifest polls the data directory for added, changed or removed files
+DATASET_POLL_SECONDS = float(os.environ.get('DATASET_POLL_SECONDS', 2))
+
+# Requests slower than this many milliseconds dump a sampled profile; unset disables profiling
+PROFILE_SLOW_REQUEST_MS = float(os.environ['PROFILE_SLOW_REQUEST_MS']) if os.environ.get('PROFILE_SLOW_REQUEST_MS') else None
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles'))
+
+# Optional startup snapshot of warm /predict models and features, loaded before serving
+STARTUP_SNAPSHOT = os.environ.get('STARTUP_SNAPSHOT')
+
 # Validate paths
 if not DATA_DIR.exists():
     logger.error(f"Data directory not found at: {DATA_DIR}")
     raise FileNotFoundError(f"Data directory not found at: {DATA_DIR}")
 
-logger.info(f"Found datasets: {os.listdir(DATA_DIR)}")
+# Columns read by analyze_dataset; everything else is skipped at load time
+ANALYSIS_COLUMNS = ['Close', 'High', 'Low']
+
+# Metrics exposed on /metrics. 'analyze' stage spans recorded inside worker
+# processes (ANALYZE_WORKERS > 1) stay in those processes; loads, frame cache
+# and ticker counters are kept here.
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram('market_analyzer_stage_seconds', 'Time spent in each MarketAnalyzer stage', ['stage'])
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Request latency by route', ['route', 'method', 'status'])
+TICKERS_TOTAL = metrics.counter('market_analyzer_tickers_total', 'Tickers processed by market analysis', ['outcome'])
+BYTES_READ = metrics.counter('market_analyzer_bytes_read_total', 'Bytes read from dataset files on frame cache misses')
+SLOW_PROFILES = metrics.counter('http_slow_request_profiles_total', 'Profiles dumped for requests over PROFILE_SLOW_REQUEST_MS')
+metrics.callback_counter('frame_cache_requests_total', 'Frame cache lookups by result',
+                         lambda: {('hit',): frame_cache.hits, ('miss',): frame_cache.misses}, ['result'])
+metrics.callback_counter('frame_cache_evictions_total', 'Frames evicted from the frame cache', lambda: frame_cache.evictions)
+metrics.gauge('frame_cache_hit_ratio', 'Frame cache hits over all lookups', lambda: frame_cache.stats()['hit_rate'])
+metrics.gauge('frame_cache_bytes', 'Bytes held by the frame cache', lambda: frame_cache.stats()['bytes'])
+metrics.gauge('frame_cache_entries', 'Frames held by the frame cache', lambda: frame_cache.stats()['entries'])
 
 app = Flask(__name__)
 CORS(app)
 
+# Dataset list and metadata served from memory; a polling thread picks up file changes
+manifest = DatasetManifest(DATA_DIR, poll_interval=DATASET_POLL_SECONDS)
+
+# Sorted date index per cached history frame, for /history range lookups
+date_indexes = DateIndexCache()
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_pid: Optional[int] = None
+
+def io_executor() -> ThreadPoolExecutor:
+    """Bounded per-process pool for dataset loads; recreated in forked server workers"""
+    global _io_executor, _io_executor_pid
+    if _io_executor is None or _io_executor_pid != os.getpid():
+        _io_executor = ThreadPoolExecutor(max_workers=ANALYZE_IO_THREADS, thread_name_prefix='analyze-io')
+        _io_executor_pid = os.getpid()
+    return _io_executor
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if PROFILE_SLOW_REQUEST_MS is not None:
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        if elapsed * 1000 >= PROFILE_SLOW_REQUEST_MS and profiler.samples:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            name = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+            path = PROFILE_DIR / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.folded"
+            profiler.dump(str(path))
+            SLOW_PROFILES.inc()
+            logger.warning(f"Slow request {request.method} {request.path} took {elapsed * 1000:.0f}ms; profile written to {path}")
+    return response
+
 class MarketAnalyzer:
     @staticmethod
-    def get_available_tickers() -> List[str]:
-        """Get list of available tickers from data directory"""
-        return [f.replace('.csv', '') for f in os.listdir(DATA_DIR) if f.endswith('.csv')]
+    def get_available_tickers(datasets: Optional[DatasetManifest] = None) -> List[str]:
+        """Get list of available tickers (CSV files and standalone columnar datasets) from a manifest (default: DATA_DIR's)"""
+        with STAGE_SECONDS.time(stage='list'):
+            return (datasets if datasets is not None else manifest).tickers()
 
     @staticmethod
-    def load_data(ticker: str) -> pd.DataFrame:
-        """Load historical data for given ticker"""
-        file_path = DATA_DIR / f"{ticker}.csv"
+    def load_data(ticker: str, columns: Optional[List[str]] = None,
+                  data_dir: Optional[Path] = None, min_rows: int = 30) -> pd.DataFrame:
+        """
+        Load historical data for given ticker from data_dir (default: DATA_DIR), optionally projected to a subset of columns
+
+        Raises ValueError for datasets shorter than min_rows, too short to analyze.
+        """
+        file_path = Path(data_dir or DATA_DIR) / f"{ticker}.csv"
+        variant = tuple(columns) if columns is not None else None
+
+        def read(_):
+            df = load_frame(file_path, columns)
+            BYTES_READ.inc(dataset_bytes(file_path, columns))
+            return df
+
         try:
-            df = pd.read_csv(file_path)
-            if len(df) < 30:
+            with STAGE_SECONDS.time(stage='load'):
+                df = frame_cache.get(dataset_source(file_path), read, variant)
+            if len(df) < min_rows:
                 raise ValueError(f"Insufficient data points ({len(df)}) for {ticker}")
             return df
         except Exception as e:
@@ -48,84 +173,412 @@ class MarketAnalyzer:
             raise
 
     @staticmethod
-    def analyze_dataset(ticker: str) -> Dict[str, Union[str, float]]:
-        """Analyze a single stock dataset"""
-        try:
-            df = MarketAnalyzer.load_data(ticker)
-            
-            # Calculate key metrics
+    def summarize(ticker: str, df: pd.DataFrame) -> Dict[str, Union[str, float]]:
+        """Key metrics of one loaded dataset"""
+        with STAGE_SECONDS.time(stage='analyze'):
             latest_close = df['Close'].iloc[-1]
             mean_close = df['Close'].mean()
             return_pct = ((latest_close - mean_close) / mean_close) * 100
             volatility = (df['High'] - df['Low']).mean() / df['Close'].mean() * 100
-            
-            return {
-                'ticker': ticker,
-                'return_percent': round(return_pct, 2),
-                'volatility': round(volatility, 2),
-                'last_close': round(latest_close, 2),
-                'mean_close': round(mean_close, 2)
-            }
+        
+        return {
+            'ticker': ticker,
+            'return_percent': round(return_pct, 2),
+            'volatility': round(volatility, 2),
+            'last_close': round(latest_close, 2),
+            'mean_close': round(mean_close, 2)
+        }
+
+    @staticmethod
+    def analyze_dataset(ticker: str, data_dir: Optional[Path] = None) -> Dict[str, Union[str, float]]:
+        """Analyze a single stock dataset"""
+        try:
+            df = MarketAnalyzer.load_data(ticker, columns=ANALYSIS_COLUMNS, data_dir=data_dir)
+            return MarketAnalyzer.summarize(ticker, df)
         except Exception as e:
             logger.warning(f"Skipping {ticker} analysis: {str(e)}")
             raise
 
     @staticmethod
-    def generate_market_analysis() -> Dict[str, List[Dict]]:
-        """Generate comprehensive market analysis"""
-        tickers = MarketAnalyzer.get_available_tickers()
-        successful_analyses = []
-        
-        for ticker in tickers:
-            try:
-                analysis = MarketAnalyzer.analyze_dataset(ticker)
-                successful_analyses.append(analysis)
-            except:
-                continue
+    def try_analyze_dataset(ticker: str, data_dir: Optional[Path] = None) -> Optional[Dict[str, Union[str, float]]]:
+        """Analyze a single stock dataset, returning None if it cannot be analyzed"""
+        try:
+            return MarketAnalyzer.analyze_dataset(ticker, data_dir)
+        except Exception:
+            return None
+
+    @staticmethod
+    def try_load_dataset(ticker: str, data_dir: Optional[Path] = None) -> Optional[pd.DataFrame]:
+        """Analysis columns of one dataset, or None if it cannot be loaded (load_data logs why)"""
+        try:
+            return MarketAnalyzer.load_data(ticker, columns=ANALYSIS_COLUMNS, data_dir=data_dir)
+        except Exception:
+            return None
+
+    @staticmethod
+    def try_summarize(item: Tuple[str, pd.DataFrame]) -> Optional[Dict[str, Union[str, float]]]:
+        """summarize() for a (ticker, frame) pair in a worker process, returning None on failure"""
+        ticker, df = item
+        try:
+            return MarketAnalyzer.summarize(ticker, df)
+        except Exception as e:
+            logger.warning(f"Skipping {ticker} analysis: {str(e)}")
+            return None
+
+    @staticmethod
+    def _map_io(func, tickers: List[str]) -> List:
+        if ANALYZE_IO_THREADS <= 1:
+            return [func(ticker) for ticker in tickers]
+        return list(io_executor().map(func, tickers))
+
+    @staticmethod
+    def generate_market_analysis(workers: int = 1, datasets: Optional[DatasetManifest] = None) -> Dict[str, List[Dict]]:
+        """
+        Generate comprehensive market analysis of the datasets in a manifest (default: DATA_DIR's)
+
+        Tickers are loaded and analyzed over the bounded I/O thread pool so
+        file loads overlap. With workers > 1 the frames are still loaded here,
+        through the frame cache, and only the analysis of the loaded frames
+        fans out over worker processes; short-lived pool children would
+        otherwise re-parse every file on every rebuild.
+        """
+        tickers = MarketAnalyzer.get_available_tickers(datasets)
+        data_dir = datasets.data_dir if datasets is not None else DATA_DIR
+        if workers > 1:
+            frames = MarketAnalyzer._map_io(partial(MarketAnalyzer.try_load_dataset, data_dir=data_dir), tickers)
+            loaded = [(ticker, df) for ticker, df in zip(tickers, frames) if df is not None]
+            results = parallel_map(MarketAnalyzer.try_summarize, loaded, workers)
+            results += [None] * (len(tickers) - len(loaded))
+        else:
+            results = MarketAnalyzer._map_io(partial(MarketAnalyzer.try_analyze_dataset, data_dir=data_dir), tickers)
+        successful_analyses = [analysis for analysis in results if analysis is not None]
+        TICKERS_TOTAL.inc(len(successful_analyses), outcome='analyzed')
+        TICKERS_TOTAL.inc(len(results) - len(successful_analyses), outcome='skipped')
         
         if not successful_analyses:
             raise ValueError("No datasets could be analyzed")
         
         # Sort by return percentage (descending)
-        successful_analyses.sort(key=lambda x: x['return_percent'], reverse=True)
+        with STAGE_SECONDS.time(stage='sort'):
+            successful_analyses.sort(key=lambda x: x['return_percent'], reverse=True)
         
         return {
             'all_stocks': successful_analyses,
             'recommended': successful_analyses[:3]  # Top 3 performers
         }
 
+class AnalysisSnapshot:
+    """
+    Precomputed /analyze response, rebuilt by a background thread when the data directory changes
+
+    Encoded (and compressed) bodies are cached per representation until the
+    next rebuild, so repeated polls in any format cost no serialization. A
+    rebuild runs without blocking readers: the new snapshot is published as
+    one (payload, etag, status, variants) tuple, so requests keep getting the
+    previous one until it is swapped in.
+    """
+
+    def __init__(self, refresh_interval: float, workers: int = 1):
+        self.refresh_interval = refresh_interval
+        self.workers = workers
+        self.state: Optional[Tuple[Dict, str, int, Dict[Tuple[str, Optional[str]], Tuple[bytes, Optional[str]]]]] = None
+        self._signature = None
+        self._lock = threading.Lock()
+        # Held for a whole rebuild so only one runs at a time; readers never take it
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def data_signature() -> Tuple:
+        """Fingerprint of the data directory from the manifest: name, mtime and size of every dataset"""
+        return manifest.signature()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recompute the snapshot if the data directory changed; returns True if it was rebuilt"""
+        with self._refresh_lock:
+            signature = self.data_signature()
+            if not force and self.state is not None and signature == self._signature:
+                return False
+
+            try:
+                start_time = datetime.now()
+                analysis = MarketAnalyzer.generate_market_analysis(workers=self.workers)
+                logger.info(f"Analysis completed in {(datetime.now() - start_time).total_seconds():.2f}s")
+                payload = {
+                    'status': 'success',
+                    'analysis': analysis,
+                    'analyzed_at': datetime.now().isoformat(),
+                    'datasets_analyzed': len(analysis['all_stocks'])
+                }
+                status = 200
+            except Exception as e:
+                logger.error(f"Market analysis failed: {str(e)}", exc_info=True)
+                payload = {
+                    'status': 'error',
+                    'error': str(e),
+                    'available_datasets': MarketAnalyzer.get_available_tickers()
+                }
+                status = 500
+
+            etag = hashlib.sha1(encode(payload, JSON_MIMETYPE)).hexdigest()
+            self.state = (payload, etag, status, {})
+            self._signature = signature
+            return True
+
+    def get(self) -> Tuple[Dict, str, int, Dict]:
+        """Return (payload, etag, status, encoded variants), computing the first snapshot synchronously"""
+        state = self.state
+        if state is None:
+            self.refresh()
+            state = self.state
+        return state
+
+    def start(self) -> None:
+        """Start the background refresh thread once per process"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='analysis-snapshot', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Snapshot refresh failed: {str(e)}", exc_info=True)
+
+snapshot = AnalysisSnapshot(ANALYZE_REFRESH_SECONDS, workers=ANALYZE_WORKERS)
+
+# Fitted models are kept in memory and persisted through the model registry across restarts
+predictor = PredictionService(DATA_DIR, model_registry=ModelRegistry(), loader=MarketAnalyzer.load_data)
+
+def warm_start(build: bool = True) -> None:
+    """
+    Prepare caches before serving
+
+    Loads the STARTUP_SNAPSHOT (if configured) into the /predict service. With
+    build, the /analyze snapshot is computed, every /predict model is warmed
+    and the startup snapshot is rewritten for the next process. No background
+    thread is started: this runs in the parent before the server forks, and
+    threads (and any locks they hold) do not survive a fork.
+    """
+    logger.info(f"Found {len(MarketAnalyzer.get_available_tickers())} datasets in {DATA_DIR}")
+    if STARTUP_SNAPSHOT:
+        logger.info(f"Loaded {predictor.load_snapshot(STARTUP_SNAPSHOT)} warm models from {STARTUP_SNAPSHOT}")
+    if not build:
+        return
+    snapshot.refresh(force=True)
+    if STARTUP_SNAPSHOT:
+        predictor.warm(MarketAnalyzer.get_available_tickers())
+        predictor.save_snapshot(STARTUP_SNAPSHOT)
+
+def start_background_threads() -> None:
+    """Start the manifest poller and the /analyze snapshot refresher in this process (after any fork)"""
+    manifest.start()
+    snapshot.start()
+
+def negotiated_response(payload: Dict, status: int = 200, etag: Optional[str] = None,
+                        variants: Optional[Dict] = None):
+    """
+    Encode payload in the format and encoding negotiated from Accept / Accept-Encoding
+
+    Bodies of at least COMPRESS_MIN_BYTES are compressed. variants, when
+    given, caches encoded bodies per representation across requests. Each
+    representation gets its own ETag derived from etag.
+    """
+    mimetype, encoding = negotiate(request.accept_mimetypes, request.accept_encodings)
+    key = (mimetype, encoding)
+    cached = variants.get(key) if variants is not None else None
+    if cached is None:
+        body = encode(payload, mimetype)
+        applied = None
+        if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+            body, applied = compress(body, encoding), encoding
+        cached = (body, applied)
+        if variants is not None:
+            variants[key] = cached
+    body, applied = cached
+
+    response = app.response_class(body, status=status, mimetype=mimetype)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    if applied is not None:
+        response.headers['Content-Encoding'] = applied
+    if etag is not None:
+        response.set_etag(f"{etag}-{mimetype.rsplit('/', 1)[-1]}-{applied or 'identity'}")
+    return response
+
 @app.route('/analyze', methods=['GET'])
 def analyze_market():
-    """Endpoint for complete market analysis"""
+    """
+    Endpoint for complete market analysis, served from the precomputed snapshot
+
+    Supports JSON or MessagePack via Accept, gzip/br via Accept-Encoding, and
+    fields (stock record keys), offset and limit (pages of all_stocks).
+    """
+    start_background_threads()
     try:
-        start_time = datetime.now()
-        analysis = MarketAnalyzer.generate_market_analysis()
-        
-        logger.info(f"Analysis completed in {(datetime.now() - start_time).total_seconds():.2f}s")
-        
-        return jsonify({
-            'status': 'success',
-            'analysis': analysis,
-            'analyzed_at': datetime.now().isoformat(),
-            'datasets_analyzed': len(analysis['all_stocks'])
+        view = parse_view(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    payload, etag, status, variants = snapshot.get()
+    if status != 200:
+        return negotiated_response(payload, status)
+
+    if is_default_view(view):
+        response = negotiated_response(payload, etag=etag, variants=variants)
+    else:
+        analysis = payload['analysis']
+        page, pagination = paginate(analysis['all_stocks'], view)
+        payload = dict(payload, pagination=pagination, analysis={
+            'all_stocks': select_fields(page, view['fields']),
+            'recommended': select_fields(analysis['recommended'], view['fields'])
         })
-        
+        view_etag = hashlib.sha1(f"{etag}:{request.query_string.decode()}".encode()).hexdigest()
+        response = negotiated_response(payload, etag=view_etag)
+
+    # Clients revalidate every poll; an unchanged snapshot costs a 304 with no body
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/predict', methods=['GET', 'POST'])
+def predict():
+    """
+    Batched model predictions: predicted 10-day return and recommendation score per ticker
+
+    Tickers come from a JSON body {"tickers": [...]} or ?tickers=A,B; all
+    available datasets are predicted when none are given. Tickers without a
+    dataset are reported in errors without reaching the predictor.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        tickers = body.get('tickers')
+    else:
+        tickers = request.args.get('tickers')
+        tickers = tickers.split(',') if tickers else None
+
+    if tickers is None:
+        tickers = MarketAnalyzer.get_available_tickers()
+    if not isinstance(tickers, list) or not all(isinstance(t, str) and t for t in tickers):
+        return jsonify({'status': 'error', 'error': 'tickers must be a list of ticker symbols'}), 400
+    if len(tickers) > PREDICT_MAX_TICKERS:
+        return jsonify({'status': 'error', 'error': f'At most {PREDICT_MAX_TICKERS} tickers per request'}), 400
+
+    # Only tickers with a dataset in the manifest reach the predictor (and the file system)
+    manifest.start()
+    # Symbols are case-insensitive; each one is predicted once, in first-seen order
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+    unknown = {t: f'Unknown ticker {t}' for t in tickers if manifest.get(t) is None}
+    with STAGE_SECONDS.time(stage='predict'):
+        predictions, errors = predictor.predict([t for t in tickers if t not in unknown])
+    return jsonify({
+        'status': 'success',
+        'predictions': predictions,
+        'errors': {**unknown, **errors},
+        'predicted_at': datetime.now().isoformat()
+    })
+
+def _history_params(columns: List[str]) -> Dict:
+    """Parse and validate /history query parameters, raising ValueError with a client-facing message"""
+    args = request.args
+    params = {}
+    for name in ('start', 'end'):
+        value = args.get(name)
+        try:
+            params[name] = pd.Timestamp(value) if value else None
+        except ValueError:
+            raise ValueError(f"{name} must be an ISO date, got '{value}'")
+    if params['start'] is not None and params['end'] is not None and params['start'] > params['end']:
+        raise ValueError("start must not be after end")
+
+    selected = [col.strip() for col in args.get('columns', '').split(',') if col.strip()]
+    unknown = [col for col in selected if col not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns {unknown}; available: {columns}")
+    params['columns'] = ['Date'] + [col for col in selected if col != 'Date'] if selected else list(columns)
+
+    try:
+        params['offset'] = int(args.get('offset', 0))
+        params['limit'] = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if params['offset'] < 0 or (params['limit'] is not None and params['limit'] < 1):
+        raise ValueError("offset must be >= 0 and limit >= 1")
+
+    params['format'] = args.get('format', 'ndjson')
+    if params['format'] not in HISTORY_FORMATS:
+        raise ValueError(f"format must be one of {list(HISTORY_FORMATS)}")
+    return params
+
+@app.route('/history/<ticker>', methods=['GET'])
+def history(ticker: str):
+    """
+    Price history of one ticker, streamed as NDJSON (default) or a JSON array
+
+    Query parameters: start/end (inclusive ISO dates), columns (comma
+    separated; Date is always included), offset/limit (rows within the date
+    range) and format (ndjson or json). X-Total-Count holds the rows in the
+    range and X-Next-Offset, when present, the offset of the next page.
+    """
+    ticker = ticker.upper()
+    if manifest.get(ticker) is None:
+        return jsonify({'status': 'error', 'error': f'Unknown ticker {ticker}'}), 404
+    try:
+        # Any number of rows is valid history; the minimum only applies to analysis
+        source = dataset_source(DATA_DIR / f"{ticker}.csv")
+        stat = os.stat(source)
+        df = MarketAnalyzer.load_data(ticker, min_rows=0)
+        if 'Date' not in df.columns:
+            raise ValueError(f"{ticker} has no Date column")
     except Exception as e:
-        logger.error(f"Market analysis failed: {str(e)}", exc_info=True)
-        return jsonify({
-            'status': 'error',
-            'error': str(e),
-            'available_datasets': MarketAnalyzer.get_available_tickers()
-        }), 500
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+    try:
+        params = _history_params(list(df.columns))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+
+    with STAGE_SECONDS.time(stage='history'):
+        index = date_indexes.get(ticker, (stat.st_mtime_ns, stat.st_size), df['Date'])
+        lo, hi = index.range(params['start'], params['end'])
+        first = min(lo + params['offset'], hi)
+        last = hi if params['limit'] is None else min(first + params['limit'], hi)
+        rows = index.rows(first, last)
+
+    headers = {'X-Total-Count': str(hi - lo)}
+    if last < hi:
+        headers['X-Next-Offset'] = str(params['offset'] + len(rows))
+    mimetype = 'application/x-ndjson' if params['format'] == 'ndjson' else 'application/json'
+    records = iter_records(df, rows, params['columns'], params['format'], HISTORY_CHUNK_ROWS,
+                           dates=index.dates[first:last])
+    return app.response_class(records, mimetype=mimetype, headers=headers)
 
 @app.route('/datasets', methods=['GET'])
 def list_datasets():
-    """Endpoint to list available datasets"""
-    return jsonify({
+    """
+    Endpoint to list available datasets with their rows, date range, size, mtime and checksum
+
+    Negotiates format and compression like /analyze; fields, offset and
+    limit select record keys and a page of datasets.
+    """
+    manifest.start()
+    try:
+        view = parse_view(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    datasets = manifest.entries()
+    payload = {
         'status': 'success',
-        'datasets': MarketAnalyzer.get_available_tickers(),
-        'last_updated': datetime.now().isoformat()
-    })
+        'count': len(datasets),
+        'last_updated': manifest.refreshed_at.isoformat()
+    }
+    if is_default_view(view):
+        payload['datasets'] = datasets
+    else:
+        page, payload['pagination'] = paginate(datasets, view)
+        payload['datasets'] = select_fields(page, view['fields'])
+    return negotiated_response(payload)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -133,8 +586,32 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'available_datasets': MarketAnalyzer.get_available_tickers(),
+        'frame_cache': frame_cache.stats(),
         'service': 'market-analyzer'
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(port=5000, debug=True, host='0.0.0.0')
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Market analysis API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int,
+                        help="Serve with this many pre-forked worker processes (0 = one per CPU); "
+                             "without it the Flask development server is used")
+    parser.add_argument('--threads', type=int, default=8, help="Request threads per worker (default: 8)")
+    args = parser.parse_args()
+
+    if args.workers is None:
+        warm_start(build=False)
+        start_background_threads()
+        app.run(port=args.port, debug=True, host=args.host)
+    else:
+        from server import serve
+        # Warm the snapshot, models and frame cache once so every worker inherits them;
+        # polling threads start in each worker after the fork
+        serve(app, host=args.host, port=args.port, workers=resolve_workers(args.workers),
+              threads=args.threads, preload=warm_start, post_fork=start_background_threads)
\ No newline at end of file
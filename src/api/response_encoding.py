@@ -0,0 +1,114 @@
+"""
+Content negotiation for large API payloads
+
+Bodies are encoded as JSON (with orjson when installed, otherwise the
+standard library) or MessagePack (when msgpack is installed), picked from
+the Accept header, and compressed with br (when brotli is installed) or gzip
+from Accept-Encoding once they reach a size threshold. View parameters let
+clients select record fields and page through record lists so dashboards
+fetch only what they render.
+"""
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_mimetypes() -> List[str]:
+    """Response formats this process can produce, JSON first as the default"""
+    return [JSON_MIMETYPE] + (list(MSGPACK_MIMETYPES) if msgpack is not None else [])
+
+
+def available_encodings() -> List[str]:
+    """Content encodings this process can produce, best compression first"""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+
+def negotiate(accept_mimetypes, accept_encodings) -> Tuple[str, Optional[str]]:
+    """(mimetype, encoding or None) for werkzeug Accept/Accept-Encoding headers; JSON when nothing matches"""
+    mimetype = accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+    encoding = accept_encodings.best_match(available_encodings())
+    return mimetype, encoding
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars (np.float64 from round(), np.int64 counts) as plain numbers
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode(payload: Any, mimetype: str) -> bytes:
+    """Serialize payload in the given format; JSON keys are sorted like Flask's jsonify"""
+    if mimetype in MSGPACK_MIMETYPES:
+        return msgpack.packb(payload, default=_json_default)
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, default=_json_default, sort_keys=True, separators=(',', ':')).encode()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def parse_view(args) -> Dict[str, Any]:
+    """
+    fields/offset/limit query parameters as a view; raises ValueError with a client-facing message
+
+    fields is a comma separated list of record keys (all when empty).
+    """
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    try:
+        offset = int(args.get('offset', 0))
+        limit = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or (limit is not None and limit < 1):
+        raise ValueError("offset must be >= 0 and limit >= 1")
+    return {'fields': fields, 'offset': offset, 'limit': limit}
+
+
+def is_default_view(view: Dict[str, Any]) -> bool:
+    return not view['fields'] and not view['offset'] and view['limit'] is None
+
+
+def select_fields(records: Iterable[Dict], fields: List[str]) -> List[Dict]:
+    """Records reduced to the requested keys (missing keys are left out)"""
+    if not fields:
+        return list(records)
+    return [{field: record[field] for field in fields if field in record} for record in records]
+
+
+def paginate(records: List[Dict], view: Dict[str, Any]) -> Tuple[List[Dict], Dict[str, Any]]:
+    """One page of records and its pagination block (offset, limit, total, next_offset)"""
+    total = len(records)
+    end = total if view['limit'] is None else min(view['offset'] + view['limit'], total)
+    page = records[view['offset']:end]
+    pagination = {'offset': view['offset'], 'limit': view['limit'], 'total': total,
+                  'next_offset': end if end < total else None}
+    return page, pagination
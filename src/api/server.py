@@ -0,0 +1,136 @@
+"""
+Pre-fork WSGI server for the prediction API
+
+The parent binds the listening socket, optionally warms shared state (the
+analysis snapshot and frame cache) and then forks worker processes that
+accept on the same socket, so the kernel spreads connections across cores.
+Each worker handles requests on a bounded thread pool and the parent
+restarts workers that exit unexpectedly. Warmed state is inherited
+copy-on-write, so workers start serving without recomputing it. Background
+threads do not survive a fork, so they are started per worker by the
+post_fork hook rather than by preload.
+"""
+import os
+import time
+import signal
+import socket
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from werkzeug.serving import BaseWSGIServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS = 8
+LISTEN_BACKLOG = 128
+# Workers that die sooner than this after starting are restarted with a delay
+MIN_WORKER_UPTIME = 1.0
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles requests on a fixed-size thread pool instead of a thread per request"""
+
+    def __init__(self, host: str, port: int, app, threads: int = DEFAULT_THREADS, fd: Optional[int] = None):
+        super().__init__(host, port, app, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    def process_request(self, request, client_address) -> None:
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve_worker(app, host: str, port: int, threads: int, fd: int) -> None:
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=fd)
+    try:
+        server.serve_forever()
+    finally:
+        server.executor.shutdown(wait=False)
+        server.server_close()
+
+
+def serve(app, host: str = '0.0.0.0', port: int = 5000, workers: int = 1, threads: int = DEFAULT_THREADS,
+          preload: Optional[Callable[[], None]] = None, post_fork: Optional[Callable[[], None]] = None) -> None:
+    """
+    Serve a WSGI app with workers processes of threads request threads each
+
+    preload runs once in the parent before forking and must not start
+    threads; post_fork runs in every worker before it serves (and in the
+    current process when workers=1, where the app is served directly).
+    """
+    sock = _bind(host, port)
+    if preload is not None:
+        preload()
+    logger.info(f"Serving on {host}:{port} with {workers} worker(s) x {threads} thread(s)")
+
+    if workers <= 1:
+        if post_fork is not None:
+            post_fork()
+        _serve_worker(app, host, port, threads, sock.fileno())
+        return
+
+    children = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                if post_fork is not None:
+                    post_fork()
+                _serve_worker(app, host, port, threads, sock.fileno())
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(MIN_WORKER_UPTIME)
+        if not stopping:
+            spawn()
+    sock.close()
@@ -0,0 +1,134 @@
+"""
+Walk-forward backtesting
+
+The history is split into consecutive out-of-sample test blocks. Before each
+block the model is trained only on rows whose targets were fully observed by
+then (a gap of ``forecast_period`` rows is left between train and test so
+future returns never leak into training). Training windows either expand from
+the start of the history or roll with a fixed length, and the model can be
+refit every block or every few blocks. Groups of blocks that share a fitted
+model run in parallel and are predicted in one batch. The feature matrix and
+targets are sent to each worker once, when it starts; group tasks carry only
+their row ranges.
+"""
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from parallel import parallel_map
+
+DEFAULT_MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+# (X, y) of the running backtests in this process, by backtest id
+_shared_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def walk_forward_splits(n_rows: int, test_size: int, min_train_size: int, gap: int = 0,
+                        window: str = 'expanding', train_size: Optional[int] = None,
+                        refit_every: int = 1) -> List[Tuple[slice, List[slice]]]:
+    """
+    Build walk-forward folds as (train_slice, [test_slice, ...]) groups
+
+    Each group is one model fit followed by refit_every consecutive test
+    blocks. With window='rolling', training uses the last train_size
+    eligible rows (defaulting to min_train_size).
+    """
+    if window not in ('expanding', 'rolling'):
+        raise ValueError(f"Unknown window type '{window}'. Use 'expanding' or 'rolling'.")
+    if test_size < 1 or refit_every < 1:
+        raise ValueError("test_size and refit_every must be positive")
+    train_size = train_size or min_train_size
+
+    groups = []
+    test_start = min_train_size + gap
+    while test_start < n_rows:
+        train_end = test_start - gap
+        train_start = 0 if window == 'expanding' else max(0, train_end - train_size)
+        tests = []
+        for _ in range(refit_every):
+            if test_start >= n_rows:
+                break
+            tests.append(slice(test_start, min(test_start + test_size, n_rows)))
+            test_start += test_size
+        groups.append((slice(train_start, train_end), tests))
+    return groups
+
+
+def _fold_metrics(predictions: np.ndarray, actuals: np.ndarray) -> Tuple[float, float, float]:
+    directional_accuracy = np.mean(np.sign(predictions) == np.sign(actuals)) * 100
+    if len(actuals) > 1 and np.std(predictions) > 0 and np.std(actuals) > 0:
+        correlation = np.corrcoef(predictions, actuals)[0, 1]
+    else:
+        correlation = np.nan
+    mae = np.mean(np.abs(predictions - actuals))
+    return directional_accuracy, correlation, mae
+
+
+def _share_arrays(key: str, X: np.ndarray, y: np.ndarray) -> None:
+    """Pool initializer: keep a backtest's arrays for all of its group tasks"""
+    _shared_arrays[key] = (X, y)
+
+
+def _run_group(task) -> List[Tuple[float, float, float]]:
+    """Fit once on the group's training window and score every test block with a single predict"""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    key, train, tests, model_params = task
+    X, y = _shared_arrays[key]
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train])
+    model = RandomForestRegressor(**model_params)
+    model.fit(X_train, y[train])
+
+    test_rows = np.concatenate([np.arange(test.start, test.stop) for test in tests])
+    predictions = model.predict(scaler.transform(X[test_rows]))
+
+    results = []
+    offset = 0
+    for test in tests:
+        size = test.stop - test.start
+        results.append(_fold_metrics(predictions[offset:offset + size], y[test]))
+        offset += size
+    return results
+
+
+def walk_forward_backtest(X: np.ndarray, y: np.ndarray, forecast_period: int = 10,
+                          test_size: int = 20, min_train_size: int = 100,
+                          window: str = 'expanding', train_size: Optional[int] = None,
+                          refit_every: int = 1, n_workers: int = 1,
+                          model_params: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Walk-forward backtest of a RandomForest on a feature matrix and target vector
+
+    Returns per-fold arrays: test_start, test_end, train_start, train_end,
+    directional_accuracy (%), correlation and mae.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    groups = walk_forward_splits(len(y), test_size, min_train_size, gap=forecast_period,
+                                 window=window, train_size=train_size, refit_every=refit_every)
+    if not groups:
+        raise ValueError(f"Not enough rows ({len(y)}) for a walk-forward backtest "
+                         f"with min_train_size={min_train_size} and gap={forecast_period}")
+
+    params = dict(DEFAULT_MODEL_PARAMS, **(model_params or {}))
+    key = uuid.uuid4().hex
+    tasks = [(key, train, tests, params) for train, tests in groups]
+    try:
+        group_results = parallel_map(_run_group, tasks, n_workers, initializer=_share_arrays, initargs=(key, X, y))
+    finally:
+        _shared_arrays.pop(key, None)
+
+    folds = [(train, test) for train, tests in groups for test in tests]
+    metrics = np.array([m for results in group_results for m in results], dtype=np.float64)
+    return {
+        'train_start': np.array([train.start for train, _ in folds], dtype=np.int64),
+        'train_end': np.array([train.stop for train, _ in folds], dtype=np.int64),
+        'test_start': np.array([test.start for _, test in folds], dtype=np.int64),
+        'test_end': np.array([test.stop for _, test in folds], dtype=np.int64),
+        'directional_accuracy': metrics[:, 0],
+        'correlation': metrics[:, 1],
+        'mae': metrics[:, 2]
+    }
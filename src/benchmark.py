@@ -0,0 +1,224 @@
+"""
+Performance benchmarks over synthetic universes
+
+Generates universes with sampleDataGenerator at one or more scales
+(TICKERSxBARS), times every stage of the analysis path and records wall time
+and peak traced memory to a JSON results file. Time and memory come from
+separate runs of each stage, since tracing memory distorts the timings.
+Results can be compared with a stored baseline; stages slower than the
+baseline by more than the tolerance are reported as regressions and make the
+run exit non-zero.
+
+Usage:
+    python benchmark.py --scale 10x200 --scale 1000x1000 --output bench_results.json
+    python benchmark.py --baseline benchmarks/baseline.json
+    python benchmark.py --scale 10x200 --save-baseline benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from functools import partial
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sampleDataGenerator import generate_universe
+from dataset_manifest import DatasetManifest
+from prediction import StockDataProcessor, StockAnalyzer, StockRecommender
+
+# The API module lives in src/api
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'api'))
+import prediction_api
+
+DEFAULT_SCALES = ['10x200', '100x1000']
+DEFAULT_MODEL_SAMPLE = 10
+DEFAULT_TOLERANCE = 0.2
+
+
+def parse_scale(scale):
+    """Parse 'TICKERSxBARS' into (tickers, bars)"""
+    try:
+        tickers, bars = (int(part.replace(',', '').replace('_', '')) for part in scale.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid scale '{scale}'. Use TICKERSxBARS, e.g. 1000x1000")
+    return tickers, bars
+
+
+class StageTimer:
+    """
+    Collects wall time and peak traced memory per stage for one scale
+
+    tracemalloc slows allocation-heavy code by a large factor, so a stage is
+    timed in an untraced run and its peak memory comes from a second, traced
+    run (skipped when trace_memory is False).
+    """
+
+    def __init__(self, scale, trace_memory=True):
+        self.scale = scale
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def run(self, name, items, func, reset=None):
+        """Time func(), then rerun it under tracemalloc for its peak (after reset(), if given); returns the timed result"""
+        # The analysis code prints per ticker; keep that out of the timings
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            result = func()
+            seconds = time.perf_counter() - start
+
+            peak_mb = None
+            if self.trace_memory:
+                if reset is not None:
+                    reset()
+                tracemalloc.start()
+                try:
+                    func()
+                    peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                finally:
+                    tracemalloc.stop()
+
+        self.results.append({
+            'scale': self.scale,
+            'stage': name,
+            'items': items,
+            'seconds': round(seconds, 6),
+            'peak_mb': round(peak_mb, 3) if peak_mb is not None else None
+        })
+        memory = f"{peak_mb:>10.1f} MB" if peak_mb is not None else f"{'-':>10}   "
+        print(f"  {name:<32}{seconds:>10.3f}s {memory}  ({items} items)")
+        return result
+
+
+def run_scale(scale, model_sample, work_dir, trace_memory=True):
+    """Generate one universe and benchmark every stage on it"""
+    n_tickers, n_bars = parse_scale(scale)
+    data_dir = os.path.join(work_dir, scale)
+    os.makedirs(data_dir, exist_ok=True)
+
+    print(f"\nScale {scale}: generating {n_tickers} tickers x {n_bars} bars")
+    generate_universe(n_tickers, n_bars, data_dir, workers=0, prefix='T')
+    paths = sorted(Path(data_dir).glob('*.csv'))
+    timer = StageTimer(scale, trace_memory)
+
+    processors = {path.stem: StockDataProcessor(str(path)) for path in paths}
+    timer.run('StockDataProcessor.load_data', len(processors),
+              lambda: [processor.load_data() for processor in processors.values()])
+    # The memory pass cleans the raw frames again, not the already cleaned ones
+    raw = {ticker: processor.data.copy() for ticker, processor in processors.items()}
+
+    def restore_raw():
+        for ticker, processor in processors.items():
+            processor.data = raw[ticker]
+    timer.run('StockDataProcessor.clean_data', len(processors),
+              lambda: [processor.clean_data() for processor in processors.values()], reset=restore_raw)
+    # Indicators are added in place, so the memory pass starts again from the cleaned frames
+    raw = {ticker: processor.data.copy() for ticker, processor in processors.items()}
+    frames = timer.run('add_technical_indicators', len(processors),
+                       lambda: {ticker: p.add_technical_indicators(use_adj_close=True) for ticker, p in processors.items()},
+                       reset=restore_raw)
+    del raw
+    frames = {ticker: df for ticker, df in frames.items() if len(df)}
+    del processors
+
+    analyzers = {ticker: StockAnalyzer(df) for ticker, df in frames.items()}
+    timer.run('calculate_performance_metrics', len(analyzers),
+              lambda: [analyzer.calculate_performance_metrics(ticker) for ticker, analyzer in analyzers.items()])
+
+    # Model stages are orders of magnitude slower per ticker, so run them on a sample
+    sample = dict(list(analyzers.items())[:model_sample])
+    if sample:
+        timer.run('build_prediction_model', len(sample),
+                  lambda: [analyzer.build_prediction_model(forecast_period=10) for analyzer in sample.values()])
+        timer.run('backtest_model', len(sample),
+                  lambda: [analyzer.backtest_model() for analyzer in sample.values()])
+
+        recommender = StockRecommender()
+        for ticker in sample:
+            recommender.add_stock_data(ticker, frames[ticker])
+        timer.run('generate_recommendations', len(sample), lambda: recommender.generate_recommendations(top_n=5))
+
+    datasets = DatasetManifest(data_dir)
+    analyze = partial(prediction_api.MarketAnalyzer.generate_market_analysis, datasets=datasets)
+    prediction_api.frame_cache.invalidate()
+    timer.run('generate_market_analysis (cold)', len(paths), analyze, reset=prediction_api.frame_cache.invalidate)
+    timer.run('generate_market_analysis (warm)', len(paths), analyze)
+
+    return timer.results
+
+
+def compare(results, baseline, tolerance):
+    """Return (scale, stage, baseline_s, current_s) for stages slower than baseline by more than tolerance"""
+    reference = {(r['scale'], r['stage']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = reference.get((result['scale'], result['stage']))
+        if base is None or base['items'] != result['items']:
+            continue
+        if result['seconds'] > base['seconds'] * (1 + tolerance):
+            regressions.append((result['scale'], result['stage'], base['seconds'], result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis stages on synthetic universes")
+    parser.add_argument('--scale', action='append', dest='scales',
+                        help=f"Universe size as TICKERSxBARS; repeatable (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument('--model-sample', type=int, default=DEFAULT_MODEL_SAMPLE,
+                        help="Tickers used for the model and recommendation stages")
+    parser.add_argument('--work-dir', help="Directory for generated data (default: a temporary directory)")
+    parser.add_argument('--output', default='bench_results.json', help="Results file to write")
+    parser.add_argument('--baseline', help="Baseline results file to compare against")
+    parser.add_argument('--save-baseline', help="Also write the results to this baseline file")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the traced rerun of every stage that measures peak memory")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown versus baseline before flagging a regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    scales = args.scales or DEFAULT_SCALES
+    for scale in scales:
+        parse_scale(scale)
+
+    results = []
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix='bench-'))
+        for scale in scales:
+            results.extend(run_scale(scale, args.model_sample, work_dir, trace_memory=not args.no_memory))
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'results': results
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n===== REGRESSIONS (> {args.tolerance:.0%} slower than baseline) =====")
+            for scale, stage, base, current in regressions:
+                print(f"{scale:<12}{stage:<34}{base:>10.3f}s -> {current:.3f}s ({current / base - 1:+.0%})")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Columnar binary storage for per-ticker price history
+
+Converted datasets live in <data_dir>/.columnar/<TICKER>/ as one .npy file per
+column plus a meta.json recording column order and the source CSV's
+mtime/size. Readers memory-map only the requested columns and fall back to
+the CSV for files that are unconverted or have changed since conversion.
+Datasets can also be written straight to the store with no CSV at all
+(write_frame); those are used whenever no CSV of the same name exists.
+
+Usage:
+    python columnar_store.py [data_dir] [--force]
+"""
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+STORE_DIRNAME = '.columnar'
+META_FILENAME = 'meta.json'
+FORMAT_VERSION = 1
+
+PathLike = Union[str, Path]
+
+
+def store_path(csv_path: PathLike) -> Path:
+    """Return the columnar directory for a CSV file"""
+    csv_path = Path(csv_path)
+    return csv_path.parent / STORE_DIRNAME / csv_path.stem
+
+
+def _column_filename(index: int) -> str:
+    return f"col_{index:03d}.npy"
+
+
+def _source_signature(csv_path: PathLike) -> Dict[str, int]:
+    stat = os.stat(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def read_meta(csv_path: PathLike) -> Optional[Dict]:
+    """Return the store metadata if a conversion exists and matches the current CSV, else None"""
+    meta_path = store_path(csv_path) / META_FILENAME
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+    if meta.get('source') is None:
+        # Standalone dataset: valid as long as no CSV has been written alongside it
+        return None if os.path.exists(csv_path) else meta
+    try:
+        if meta['source'] != _source_signature(csv_path):
+            return None
+    except OSError:
+        return None
+    return meta
+
+
+def is_converted(csv_path: PathLike) -> bool:
+    """Whether an up-to-date columnar copy of the CSV exists"""
+    return read_meta(csv_path) is not None
+
+
+def convert_csv(csv_path: PathLike, force: bool = False) -> bool:
+    """
+    Convert a single CSV into the columnar store
+
+    Returns True if the file was written. Files whose columns cannot all be
+    stored as fixed-width NumPy dtypes (for example a Date column with mixed
+    timezone offsets) are left as CSV and False is returned.
+    """
+    csv_path = Path(csv_path)
+    if not force and is_converted(csv_path):
+        return False
+
+    signature = _source_signature(csv_path)
+    df = pd.read_csv(csv_path)
+    try:
+        _write_store(store_path(csv_path), df, signature)
+    except ValueError:
+        return False
+    return True
+
+
+def write_frame(data_dir: PathLike, ticker: str, df: pd.DataFrame) -> Path:
+    """
+    Write a frame directly into the store as a standalone dataset (no CSV)
+
+    Raises ValueError if a column cannot be stored with a fixed-width dtype.
+    """
+    target = Path(data_dir) / STORE_DIRNAME / ticker
+    _write_store(target, df, None)
+    return target
+
+
+def _write_store(target: Path, df: pd.DataFrame, source: Optional[Dict[str, int]]) -> None:
+    df = df.copy(deep=False)
+    if 'Date' in df.columns:
+        try:
+            df['Date'] = pd.to_datetime(df['Date'])
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Date column cannot be stored as datetime64: {e}")
+
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind not in 'biufM':
+            raise ValueError(f"Column '{col}' has non-fixed-width dtype {values.dtype}")
+        columns[col] = values
+
+    target.mkdir(parents=True, exist_ok=True)
+    for index, (col, values) in enumerate(columns.items()):
+        np.save(target / _column_filename(index), values, allow_pickle=False)
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'source': source,
+        'rows': len(df),
+        'columns': [
+            {'name': col, 'file': _column_filename(index), 'dtype': str(values.dtype)}
+            for index, (col, values) in enumerate(columns.items())
+        ]
+    }
+    # Write the metadata last so readers never see a partially written store
+    tmp_path = target / (META_FILENAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, target / META_FILENAME)
+
+
+def convert_directory(data_dir: PathLike, force: bool = False) -> Dict[str, bool]:
+    """Convert every CSV in a directory, returning {filename: converted}"""
+    data_dir = Path(data_dir)
+    return {
+        path.name: convert_csv(path, force=force)
+        for path in sorted(data_dir.glob('*.csv'))
+    }
+
+
+def list_datasets(data_dir: PathLike) -> List[str]:
+    """Sorted dataset names in a directory: every CSV plus standalone columnar datasets"""
+    data_dir = Path(data_dir)
+    names = {path.stem for path in data_dir.glob('*.csv')}
+    for meta_path in (data_dir / STORE_DIRNAME).glob(f'*/{META_FILENAME}'):
+        name = meta_path.parent.name
+        if name not in names and read_meta(data_dir / f'{name}.csv') is not None:
+            names.add(name)
+    return sorted(names)
+
+
+def dataset_source(csv_path: PathLike) -> Path:
+    """The file whose mtime/size identifies a dataset's contents: the CSV, or the store metadata if there is no CSV"""
+    csv_path = Path(csv_path)
+    if csv_path.exists():
+        return csv_path
+    return store_path(csv_path) / META_FILENAME
+
+
+def available_columns(csv_path: PathLike) -> List[str]:
+    """Return the column names of a dataset without loading any rows"""
+    meta = read_meta(csv_path)
+    if meta is not None:
+        return [col['name'] for col in meta['columns']]
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def dataset_bytes(csv_path: PathLike, columns: Optional[Iterable[str]] = None) -> int:
+    """Bytes load_frame reads from disk for these columns: the requested column files, or the whole CSV"""
+    meta = read_meta(csv_path)
+    if meta is None:
+        return os.path.getsize(csv_path)
+    wanted = set(columns) if columns is not None else None
+    target = store_path(csv_path)
+    return sum(
+        os.path.getsize(target / col['file'])
+        for col in meta['columns']
+        if wanted is None or col['name'] in wanted
+    )
+
+
+def load_frame(csv_path: PathLike, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Load a dataset, reading only the requested columns
+
+    Uses the columnar store when an up-to-date conversion exists and falls
+    back to ``pd.read_csv`` otherwise. Requested columns that do not exist
+    are ignored, matching the behaviour of selecting from a full frame.
+    """
+    wanted = list(columns) if columns is not None else None
+    meta = read_meta(csv_path)
+
+    if meta is None:
+        if wanted is None:
+            return pd.read_csv(csv_path)
+        wanted_set = set(wanted)
+        return pd.read_csv(csv_path, usecols=lambda col: col in wanted_set)
+
+    target = store_path(csv_path)
+    stored = meta['columns']
+    if wanted is not None:
+        wanted_set = set(wanted)
+        stored = [col for col in stored if col['name'] in wanted_set]
+
+    data = {
+        col['name']: np.load(target / col['file'], mmap_mode='r', allow_pickle=False)
+        for col in stored
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(meta['rows']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert per-ticker CSVs into the columnar store")
+    parser.add_argument('data_dir', nargs='?', default=str(Path(__file__).resolve().parent / 'data'))
+    parser.add_argument('--force', action='store_true', help="Rewrite conversions that are already up to date")
+    args = parser.parse_args(argv)
+
+    results = convert_directory(args.data_dir, force=args.force)
+    for name, converted in results.items():
+        status = 'converted' if converted else ('up to date' if is_converted(Path(args.data_dir) / name) else 'kept as CSV')
+        print(f"{name}: {status}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Watched dataset manifest
+
+DatasetManifest keeps, in memory, one record per dataset in a data
+directory: ticker, row count, date range, size, mtime and a content
+checksum. A background thread polls the directory every poll_interval
+seconds with one directory listing plus one stat per dataset, and only datasets
+whose mtime or size changed are re-read to refresh their record, so serving
+the ticker list or the metadata never touches the disk.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from columnar_store import available_columns, dataset_bytes, dataset_source, list_datasets, load_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+CHECKSUM_CHUNK_BYTES = 1024 * 1024
+
+
+def file_checksum(path: Union[str, Path]) -> str:
+    """SHA-1 of a file's contents, read in chunks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetManifest:
+    """In-memory metadata of every dataset in a directory, kept current by mtime polling"""
+
+    def __init__(self, data_dir: Union[str, Path], poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.data_dir = Path(data_dir)
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.refreshed_at: Optional[datetime] = None
+        self._entries: Dict[str, Dict] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    def _describe(self, ticker: str, source: Path, signature: Tuple[int, int]) -> Dict:
+        """Read one dataset's record: rows and date range from a single column, plus size and checksum"""
+        csv_path = self.data_dir / f"{ticker}.csv"
+        entry = {
+            'ticker': ticker,
+            'rows': None,
+            'start_date': None,
+            'end_date': None,
+            'size_bytes': signature[1] if source == csv_path else dataset_bytes(csv_path),
+            'modified_at': datetime.fromtimestamp(signature[0] / 1e9).isoformat(),
+            'checksum': None
+        }
+        try:
+            columns = available_columns(csv_path)
+            date_col = 'Date' if 'Date' in columns else None
+            frame = load_frame(csv_path, [date_col or columns[0]])
+            entry['rows'] = len(frame)
+            if date_col and len(frame):
+                dates = pd.to_datetime(frame[date_col])
+                entry['start_date'] = dates.min().date().isoformat()
+                entry['end_date'] = dates.max().date().isoformat()
+            entry['checksum'] = file_checksum(source)
+        except Exception as e:
+            entry['error'] = str(e)
+        return entry
+
+    def refresh(self) -> bool:
+        """Rescan the directory, re-reading only new or changed datasets; returns True if anything changed"""
+        with self._refresh_lock:
+            signatures = {}
+            for ticker in list_datasets(self.data_dir):
+                source = dataset_source(self.data_dir / f"{ticker}.csv")
+                try:
+                    stat = os.stat(source)
+                except OSError:
+                    continue
+                signatures[ticker] = (source, (stat.st_mtime_ns, stat.st_size))
+
+            changed = {ticker: value for ticker, value in signatures.items()
+                       if self._signatures.get(ticker) != value[1]}
+            removed = set(self._signatures) - set(signatures)
+            described = {ticker: self._describe(ticker, source, signature)
+                         for ticker, (source, signature) in changed.items()}
+
+            with self._lock:
+                for ticker in removed:
+                    self._entries.pop(ticker, None)
+                    self._signatures.pop(ticker, None)
+                for ticker, entry in described.items():
+                    self._entries[ticker] = entry
+                    self._signatures[ticker] = signatures[ticker][1]
+                if described or removed or self.refreshed_at is None:
+                    self.version += 1
+                self.refreshed_at = datetime.now()
+            if described or removed:
+                logger.info(f"Dataset manifest: {len(described)} updated, {len(removed)} removed, "
+                            f"{len(signatures)} datasets")
+            return bool(described or removed)
+
+    def _ensure_loaded(self) -> None:
+        if self.refreshed_at is None:
+            self.refresh()
+
+    def tickers(self) -> List[str]:
+        """Sorted dataset names"""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._entries)
+
+    def entries(self) -> List[Dict]:
+        """Every dataset's record, sorted by ticker"""
+        self._ensure_loaded()
+        with self._lock:
+            return [dict(self._entries[ticker]) for ticker in sorted(self._entries)]
+
+    def get(self, ticker: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            return dict(entry) if entry is not None else None
+
+    def signature(self) -> Tuple:
+        """(ticker, mtime_ns, size) of every dataset as of the last refresh"""
+        self._ensure_loaded()
+        with self._lock:
+            return tuple((ticker, *self._signatures[ticker]) for ticker in sorted(self._signatures))
+
+    def start(self) -> None:
+        """Start the polling thread once per process (threads do not survive a fork)"""
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='dataset-manifest', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Dataset manifest refresh failed: {str(e)}", exc_info=True)
@@ -0,0 +1,118 @@
+"""
+Batched prediction across many fitted tree ensembles
+
+Each ticker has its own RandomForest, so scoring a universe one
+model.predict call at a time pays sklearn's per-call overhead hundreds of
+times. PackedForests flattens the trees of every model in a family (same
+estimator type and feature list) into shared node arrays and walks all of
+them for all requested rows at once with vectorised NumPy steps, one step
+per tree level.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class PackedForests:
+    """
+    Node arrays of several fitted single-output forest regressors, predicted together
+
+    Predictions match each forest's own predict(): features are compared as
+    float32 against float64 thresholds exactly as sklearn's tree code does,
+    and each forest returns the mean of its trees' leaf values.
+    """
+
+    def __init__(self, left: np.ndarray, right: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, owners: np.ndarray, max_depth: int,
+                 means: Optional[np.ndarray] = None, scales: Optional[np.ndarray] = None):
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.owners = owners
+        self.max_depth = max_depth
+        self.means = means
+        self.scales = scales
+        self.n_models = int(owners.max()) + 1 if len(owners) else 0
+        self.trees_per_model = np.bincount(owners, minlength=self.n_models)
+        self._first_tree = np.concatenate([[0], np.cumsum(self.trees_per_model)[:-1]]).astype(np.int64)
+
+    @classmethod
+    def from_forests(cls, forests: Sequence, scalers: Optional[Sequence] = None) -> 'PackedForests':
+        """Pack fitted forests (and their StandardScalers); the result no longer references sklearn objects"""
+        lefts, rights, features, thresholds, values = [], [], [], [], []
+        roots, owners = [], []
+        offset = 0
+        max_depth = 0
+
+        for index, forest in enumerate(forests):
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                left = tree.children_left.astype(np.int64)
+                right = tree.children_right.astype(np.int64)
+                leaves = left == -1
+                nodes = np.arange(tree.node_count, dtype=np.int64)
+                # Leaves point at themselves so extra traversal steps are no-ops
+                lefts.append(np.where(leaves, nodes, left) + offset)
+                rights.append(np.where(leaves, nodes, right) + offset)
+                features.append(np.where(leaves, 0, tree.feature).astype(np.int64))
+                thresholds.append(np.array(tree.threshold))
+                values.append(np.array(tree.value.reshape(tree.node_count, -1)[:, 0]))
+                roots.append(offset)
+                owners.append(index)
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+        means = scales = None
+        if scalers is not None:
+            means = np.stack([scaler.mean_ for scaler in scalers])
+            scales = np.stack([scaler.scale_ for scaler in scalers])
+        return cls(np.concatenate(lefts), np.concatenate(rights), np.concatenate(features),
+                   np.concatenate(thresholds), np.concatenate(values),
+                   np.array(roots, dtype=np.int64), np.array(owners, dtype=np.int64), max_depth, means, scales)
+
+    @classmethod
+    def concat(cls, packs: Sequence['PackedForests']) -> 'PackedForests':
+        """Join packs into one; models keep their order, so pack i's models follow those of packs before it"""
+        node_offsets = np.cumsum([0] + [len(p.left) for p in packs[:-1]])
+        model_offsets = np.cumsum([0] + [p.n_models for p in packs[:-1]])
+        scaled = all(p.means is not None for p in packs)
+        return cls(
+            np.concatenate([p.left + off for p, off in zip(packs, node_offsets)]),
+            np.concatenate([p.right + off for p, off in zip(packs, node_offsets)]),
+            np.concatenate([p.feature for p in packs]),
+            np.concatenate([p.threshold for p in packs]),
+            np.concatenate([p.value for p in packs]),
+            np.concatenate([p.roots + off for p, off in zip(packs, node_offsets)]),
+            np.concatenate([p.owners + off for p, off in zip(packs, model_offsets)]),
+            max(p.max_depth for p in packs),
+            np.concatenate([p.means for p in packs]) if scaled else None,
+            np.concatenate([p.scales for p in packs]) if scaled else None
+        )
+
+    def predict(self, X: np.ndarray, models: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Predict row i of X with model models[i] (default: row i with model i)
+
+        X holds unscaled features when the pack was built with scalers.
+        """
+        models = np.arange(self.n_models) if models is None else np.asarray(models, dtype=np.int64)
+        X = np.asarray(X, dtype=np.float64)
+        if self.means is not None:
+            X = (X - self.means[models]) / self.scales[models]
+        X = X.astype(np.float32)
+
+        counts = self.trees_per_model[models]
+        rows = np.repeat(np.arange(len(models)), counts)
+        # Index of every (row, tree) pair's tree: the model's first tree plus its position within the model
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        node = self.roots[np.repeat(self._first_tree[models], counts) + within]
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return np.bincount(rows, weights=self.value[node], minlength=len(models)) / counts
+
@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class FrameCache:
+    """Process-wide LRU cache of parsed DataFrames keyed by file path
+
+    Entries are invalidated when the file's mtime or size changes, and the
+    least recently used frames are evicted once the total in-memory size
+    exceeds ``max_bytes``. Cached frames are shared between callers and must
+    be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Tuple[int, int], pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        """Return the (mtime_ns, size) pair used to detect file changes"""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: Union[str, Path], loader: Callable[[str], pd.DataFrame] = pd.read_csv,
+            variant: Optional[Hashable] = None) -> pd.DataFrame:
+        """
+        Return the parsed frame for path, calling loader only on a miss or stale entry
+
+        variant distinguishes differently shaped loads of the same file, such
+        as a column projection; each variant is cached separately.
+        """
+        key = (str(path), variant)
+        signature = self._signature(key[0])
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        df = loader(key[0])
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            self._discard(key)
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (signature, df, nbytes)
+                self._total_bytes += nbytes
+                self._evict()
+        return df
+
+    def invalidate(self, path: Union[str, Path, None] = None) -> None:
+        """Drop every variant cached for path, or every entry when path is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                for key in [key for key in self._entries if key[0] == str(path)]:
+                    self._discard(key)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return hit/miss/eviction counters and current memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _discard(self, key: Tuple[str, Hashable]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            self._total_bytes -= nbytes
+            self.evictions += 1
+
+
+frame_cache = FrameCache(int(os.environ.get('FRAME_CACHE_MAX_MB', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024)
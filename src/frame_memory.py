@@ -0,0 +1,56 @@
+"""
+Compact in-memory layout for processed indicator frames
+
+Processed frames carry about twenty float64 columns per ticker. Compact mode
+drops intermediates that duplicate or only feed other columns (BB_Middle is
+SMA_20; BB_StdDev only feeds the bands), stores floats as float32 and
+Volume as the narrowest integer type that holds it, roughly halving the
+footprint. memory_report() shows where the memory goes.
+"""
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# BB_Middle equals SMA_20; BB_StdDev is folded into BB_Upper/BB_Lower
+COMPACT_DROP_COLUMNS = ('BB_Middle', 'BB_StdDev')
+
+
+def compact_frame(df: pd.DataFrame, drop: Iterable[str] = COMPACT_DROP_COLUMNS) -> pd.DataFrame:
+    """Return df without the dropped intermediates, floats as float32 and Volume downcast"""
+    df = df.drop(columns=[col for col in drop if col in df.columns])
+    dtypes = {col: np.float32 for col, dtype in df.dtypes.items() if dtype == np.float64}
+    df = df.astype(dtypes)
+    if 'Volume' in df.columns and pd.api.types.is_integer_dtype(df['Volume']):
+        df['Volume'] = pd.to_numeric(df['Volume'], downcast='integer')
+    return df
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Bytes held by a frame's columns and index"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def memory_report(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Per-ticker memory footprint (rows, columns, bytes, bytes_per_row), largest first
+
+    The frame's attrs['universe_bytes'] holds the universe total, counting a
+    frame shared between several tickers once.
+    """
+    records = []
+    seen = {}
+    for ticker, df in frames.items():
+        nbytes = frame_nbytes(df)
+        seen[id(df)] = nbytes
+        records.append({
+            'ticker': ticker,
+            'rows': len(df),
+            'columns': df.shape[1],
+            'bytes': nbytes,
+            'bytes_per_row': nbytes / len(df) if len(df) else 0.0
+        })
+    report = pd.DataFrame(records, columns=['ticker', 'rows', 'columns', 'bytes', 'bytes_per_row'])
+    report = report.sort_values('bytes', ascending=False, ignore_index=True)
+    report.attrs['universe_bytes'] = sum(seen.values())
+    return report
@@ -0,0 +1,104 @@
+"""
+Date-range lookups and streamed serialization of price history
+
+DateIndex keeps a frame's dates as a sorted datetime64 array (with the
+permutation back to frame rows if the file is not in date order), so a
+start/end range is two binary searches instead of a boolean filter over the
+whole frame. The cache holds only those arrays, keyed by the dataset's file
+signature; the frames themselves stay under the frame cache's memory cap.
+iter_records() then serializes the selected rows in fixed-size chunks, so a
+response never holds more than one chunk of text at a time.
+"""
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 500
+
+HISTORY_FORMATS = ('ndjson', 'json')
+
+
+class DateIndex:
+    """Sorted dates of one frame for O(log n) range lookups"""
+
+    def __init__(self, dates: pd.Series):
+        values = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+        if len(values) < 2 or (values[1:] >= values[:-1]).all():
+            self.order = None
+            self.dates = values
+        else:
+            self.order = np.argsort(values, kind='stable')
+            self.dates = values[self.order]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def range(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> Tuple[int, int]:
+        """Positions [lo, hi) in date order of the rows with start <= date <= end"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'ns'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'ns'), side='right'))
+        return lo, max(lo, hi)
+
+    def rows(self, lo: int, hi: int) -> np.ndarray:
+        """Frame row positions of date-ordered positions [lo, hi)"""
+        return np.arange(lo, hi) if self.order is None else self.order[lo:hi]
+
+
+class DateIndexCache:
+    """Per-ticker DateIndex keyed by the dataset's (mtime_ns, size); holds the sorted dates, never the frame"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[int, int], DateIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, signature: Tuple[int, int], dates: pd.Series) -> DateIndex:
+        """The index of dates (the frame's date column), rebuilt when the signature or row count changes"""
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry[0] == signature and len(entry[1]) == len(dates):
+                return entry[1]
+        index = DateIndex(dates)
+        with self._lock:
+            self._entries[ticker] = (signature, index)
+        return index
+
+
+def format_dates(dates: np.ndarray) -> np.ndarray:
+    """ISO 8601 strings of datetime64 values: YYYY-MM-DD at midnight, YYYY-MM-DDTHH:MM:SS otherwise, None for NaT"""
+    seconds = np.asarray(dates, dtype='datetime64[s]')
+    text = np.where(seconds == seconds.astype('datetime64[D]'),
+                    np.datetime_as_string(seconds, unit='D'), np.datetime_as_string(seconds, unit='s'))
+    return np.where(np.isnat(seconds), None, text.astype(object))
+
+
+def iter_records(df: pd.DataFrame, rows: np.ndarray, columns: List[str], fmt: str = 'ndjson',
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, dates: Optional[np.ndarray] = None,
+                 date_col: str = 'Date') -> Iterator[str]:
+    """
+    Serialize df rows (by position) as NDJSON lines or one JSON array, chunk by chunk
+
+    The date column is written with format_dates() whether the frame holds
+    CSV text or datetime64 values; dates, when given, are the rows' already
+    parsed dates (e.g. from a DateIndex). Missing values are written as null.
+    """
+    if fmt not in HISTORY_FORMATS:
+        raise ValueError(f"Unknown history format '{fmt}'. Use one of {HISTORY_FORMATS}")
+    positions = [df.columns.get_loc(col) for col in columns]
+    if fmt == 'json':
+        yield '['
+    for chunk_start in range(0, len(rows), chunk_rows):
+        chunk = df.iloc[rows[chunk_start:chunk_start + chunk_rows], positions]
+        if date_col in columns:
+            chunk_dates = (dates[chunk_start:chunk_start + chunk_rows] if dates is not None
+                           else pd.to_datetime(chunk[date_col]).to_numpy(dtype='datetime64[ns]'))
+            chunk = chunk.assign(**{date_col: format_dates(chunk_dates)})
+        if fmt == 'ndjson':
+            # lines=True already ends every record, including the last, with a newline
+            yield chunk.to_json(orient='records', lines=True, date_format='iso', date_unit='s')
+        else:
+            body = chunk.to_json(orient='records', date_format='iso', date_unit='s')[1:-1]
+            yield (',' if chunk_start else '') + body
+    if fmt == 'json':
+        yield ']'
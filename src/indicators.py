@@ -0,0 +1,459 @@
+"""
+Technical indicator engines
+
+Each engine computes the same columns as
+StockDataProcessor.add_technical_indicators:
+
+- add_panel_indicators() handles a whole universe at once. Prices are held in
+  a dates x tickers matrix and every indicator is a handful of 2-D NumPy
+  operations over that matrix instead of one set of pandas calls per ticker.
+- IncrementalIndicatorState extends one ticker bar by bar from running sums
+  and EWM values, at a fixed cost per bar. save()/load() persist that state,
+  so a restarted process continues without recomputing the history.
+- StreamingIndicators processes one ticker's history chunk by chunk, for
+  files too large to hold in memory. Each chunk is seeded with the previous
+  chunk's trailing prices and final EWM values, so the output matches a full
+  recompute.
+"""
+import pickle
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Columns added by add_technical_indicators, in the order it adds them
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_Signal',
+    'Daily_Return', '5D_Future_Return', '10D_Future_Return', '30D_Future_Return',
+    'Price_ROC_5', 'Price_ROC_10',
+    'BB_Middle', 'BB_StdDev', 'BB_Upper', 'BB_Lower', 'BB_Position'
+]
+
+
+def _valid_counts(valid: np.ndarray) -> np.ndarray:
+    """Cumulative count of valid rows per column, with a leading zero row"""
+    counts = np.zeros((valid.shape[0] + 1, valid.shape[1]), dtype=np.int64)
+    np.cumsum(valid, axis=0, out=counts[1:])
+    return counts
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean along axis 0; NaN until a full window of valid values is available"""
+    valid = ~np.isnan(x)
+    sums = np.zeros((x.shape[0] + 1, x.shape[1]))
+    np.cumsum(np.where(valid, x, 0.0), axis=0, out=sums[1:])
+    counts = _valid_counts(valid)
+
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= window:
+        full = (counts[window:] - counts[:-window]) == window
+        out[window - 1:] = np.where(full, (sums[window:] - sums[:-window]) / window, np.nan)
+    return out
+
+
+def _rolling_std(x: np.ndarray, window: int, mean: np.ndarray) -> np.ndarray:
+    """Trailing rolling sample standard deviation, using two-pass sums around the rolling mean"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < window:
+        return out
+
+    centre = mean[window - 1:]
+    squares = np.zeros(centre.shape)
+    for offset in range(window):
+        squares += (x[offset:x.shape[0] - window + 1 + offset] - centre) ** 2
+    out[window - 1:] = np.sqrt(squares / (window - 1))
+    return out
+
+
+def _ewm(x: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average matching pandas ewm(span=span, adjust=False) with leading NaNs"""
+    # scipy.signal takes over a second to import, so it is loaded on first use
+    from scipy.signal import lfilter
+
+    alpha = 2.0 / (span + 1.0)
+    valid = ~np.isnan(x)
+    has_data = valid.any(axis=0)
+    first = np.where(has_data, valid.argmax(axis=0), 0)
+    seed = np.where(has_data, x[first, np.arange(x.shape[1])], 0.0)
+
+    # Back-filling the leading NaNs with the first value keeps the filter at
+    # that value until the series starts, which is exactly pandas' seeding.
+    leading = np.arange(x.shape[0])[:, None] < first
+    filled = np.where(leading, seed, x)
+    filled = np.where(np.isnan(filled), 0.0, filled)
+    zi = ((1.0 - alpha) * seed)[None, :]
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=zi)
+    out[leading | ~has_data] = np.nan
+    return out
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """Shift rows by periods (positive = down), filling with NaN"""
+    out = np.full(x.shape, np.nan)
+    if periods > 0:
+        out[periods:] = x[:-periods]
+    elif periods < 0:
+        out[:periods] = x[-periods:]
+    else:
+        out[:] = x
+    return out
+
+
+def _pct_change(x: np.ndarray, periods: int) -> np.ndarray:
+    return x / _shift(x, periods) - 1
+
+
+def compute_indicator_panel(prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute every indicator for a dates x tickers price matrix
+
+    Each column may start with NaN padding (for tickers with shorter
+    histories) but must be contiguous afterwards. Returns a dict mapping each
+    name in INDICATOR_COLUMNS to a matrix of the same shape as prices.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    out = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['SMA_20'] = _rolling_mean(prices, 20)
+        out['SMA_50'] = _rolling_mean(prices, 50)
+        out['EMA_20'] = _ewm(prices, 20)
+
+        # RSI: the first diff of each series counts as a zero move, as in pandas' where()
+        delta = prices - _shift(prices, 1)
+        started = ~np.isnan(prices)
+        gain = _rolling_mean(np.where(started, np.where(delta > 0, delta, 0.0), np.nan), 14)
+        loss = _rolling_mean(np.where(started, np.where(delta < 0, -delta, 0.0), np.nan), 14)
+        out['RSI'] = 100 - (100 / (1 + gain / loss))
+
+        out['MACD'] = _ewm(prices, 12) - _ewm(prices, 26)
+        out['MACD_Signal'] = _ewm(out['MACD'], 9)
+
+        out['Daily_Return'] = _pct_change(prices, 1)
+        for period in (5, 10, 30):
+            out[f'{period}D_Future_Return'] = _shift(_pct_change(prices, period), -period)
+
+        out['Price_ROC_5'] = _pct_change(prices, 5) * 100
+        out['Price_ROC_10'] = _pct_change(prices, 10) * 100
+
+        out['BB_Middle'] = out['SMA_20']
+        out['BB_StdDev'] = _rolling_std(prices, 20, out['SMA_20'])
+        out['BB_Upper'] = out['BB_Middle'] + (2 * out['BB_StdDev'])
+        out['BB_Lower'] = out['BB_Middle'] - (2 * out['BB_StdDev'])
+        out['BB_Position'] = (prices - out['BB_Lower']) / (out['BB_Upper'] - out['BB_Lower'])
+
+    return out
+
+
+def build_price_panel(frames: Dict[str, pd.DataFrame], price_cols: Dict[str, str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack each ticker's price column into a dates x tickers matrix
+
+    Series are aligned on their last row and NaN-padded at the top, so the
+    matrix is date-aligned whenever the tickers share a trading calendar and
+    each column keeps its own contiguous history otherwise.
+    """
+    tickers = list(frames)
+    length = max((len(frames[t]) for t in tickers), default=0)
+    prices = np.full((length, len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        values = frames[ticker][price_cols[ticker]].to_numpy(dtype=np.float64)
+        if len(values):
+            prices[length - len(values):, j] = values
+    return tickers, prices
+
+
+def add_panel_indicators(frames: Dict[str, pd.DataFrame], use_adj_close: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Panel equivalent of StockDataProcessor.add_technical_indicators
+
+    Takes cleaned per-ticker frames and returns new frames with the same
+    indicator columns appended and NaN rows dropped.
+    """
+    price_cols = {
+        ticker: 'Adj Close' if use_adj_close and 'Adj Close' in df.columns else 'Close'
+        for ticker, df in frames.items()
+    }
+    tickers, prices = build_price_panel(frames, price_cols)
+    panel = compute_indicator_panel(prices)
+
+    results = {}
+    length = prices.shape[0]
+    for j, ticker in enumerate(tickers):
+        df = frames[ticker]
+        start = length - len(df)
+        indicators = pd.DataFrame(
+            {name: panel[name][start:, j] for name in INDICATOR_COLUMNS},
+            index=df.index
+        )
+        results[ticker] = pd.concat([df, indicators], axis=1).dropna()
+    return results
+
+
+class IncrementalIndicatorState:
+    """
+    Per-ticker state for updating indicators one bar at a time
+
+    Holds the trailing price window, running SMA and RSI gain/loss sums, and
+    the EWM values behind EMA_20 and MACD, so each appended bar costs a fixed
+    amount of work regardless of history length. Because the future-return
+    columns need prices that have not arrived yet, the last 30 rows are kept
+    pending and are emitted once their 30-day return is known, mirroring the
+    dropna() in add_technical_indicators.
+    """
+
+    MAX_WINDOW = 50
+    RSI_WINDOW = 14
+    FUTURE_PERIODS = (5, 10, 30)
+
+    def __init__(self, price_col: str):
+        self.price_col = price_col
+        self.count = 0
+        self.next_index = 0
+        self.prices: Deque[float] = deque(maxlen=self.MAX_WINDOW)
+        self.sum_20 = 0.0
+        self.sum_50 = 0.0
+        self.gains: Deque[float] = deque(maxlen=self.RSI_WINDOW)
+        self.losses: Deque[float] = deque(maxlen=self.RSI_WINDOW)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.ema_12 = np.nan
+        self.ema_20 = np.nan
+        self.ema_26 = np.nan
+        self.macd_signal = np.nan
+        self.pending: Deque[Tuple[Hashable, Dict]] = deque()
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, price_col: str) -> 'IncrementalIndicatorState':
+        """
+        Build state from a frame that already has indicator columns and has not been dropna()'d
+
+        This is the frame add_technical_indicators holds just before dropping
+        NaN rows; only its tail is read, so bootstrapping is cheap.
+        """
+        state = cls(price_col)
+        prices = data[price_col].to_numpy(dtype=np.float64)
+        state.count = len(prices)
+        if not len(prices):
+            return state
+
+        labels = data.index
+        state.next_index = labels[-1] + 1 if pd.api.types.is_integer(labels[-1]) else len(labels)
+        state.prices.extend(prices[-cls.MAX_WINDOW:])
+        state.sum_20 = float(prices[-20:].sum())
+        state.sum_50 = float(prices[-50:].sum())
+
+        delta = np.diff(prices, prepend=prices[0])
+        state.gains.extend(np.maximum(delta[-cls.RSI_WINDOW:], 0.0))
+        state.losses.extend(np.maximum(-delta[-cls.RSI_WINDOW:], 0.0))
+        state.gain_sum = float(sum(state.gains))
+        state.loss_sum = float(sum(state.losses))
+
+        column = prices[:, None]
+        state.ema_12 = float(_ewm(column, 12)[-1, 0])
+        state.ema_20 = float(data['EMA_20'].iloc[-1])
+        state.ema_26 = float(_ewm(column, 26)[-1, 0])
+        state.macd_signal = float(data['MACD_Signal'].iloc[-1])
+
+        tail = data.iloc[-max(cls.FUTURE_PERIODS):]
+        state.pending.extend(zip(tail.index, tail.to_dict('records')))
+        return state
+
+    def update(self, bar: Dict) -> List[Tuple[Hashable, Dict]]:
+        """
+        Append one raw bar and return the rows that became complete
+
+        bar maps the raw columns (Date, Open, ..., Volume) to values. The
+        returned (index, row) pairs have every indicator and future-return
+        column filled and can be appended directly to the processed frame.
+        """
+        price = float(bar[self.price_col])
+        window = self.prices
+        previous = window[-1] if window else np.nan
+
+        row = dict(bar)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Running window sums: drop the value leaving each window, add the new one
+            if len(window) >= 20:
+                self.sum_20 -= window[-20]
+            if len(window) == self.MAX_WINDOW:
+                self.sum_50 -= window[0]
+            self.sum_20 += price
+            self.sum_50 += price
+
+            delta = price - previous if window else 0.0
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            if len(self.gains) == self.RSI_WINDOW:
+                self.gain_sum -= self.gains[0]
+                self.loss_sum -= self.losses[0]
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_sum += gain
+            self.loss_sum += loss
+
+            self.ema_12 = self._ewm_step(self.ema_12, price, 12)
+            self.ema_20 = self._ewm_step(self.ema_20, price, 20)
+            self.ema_26 = self._ewm_step(self.ema_26, price, 26)
+            macd = self.ema_12 - self.ema_26
+            self.macd_signal = self._ewm_step(self.macd_signal, macd, 9)
+
+            self.count += 1
+            row['SMA_20'] = self.sum_20 / 20 if self.count >= 20 else np.nan
+            row['SMA_50'] = self.sum_50 / 50 if self.count >= 50 else np.nan
+            row['EMA_20'] = self.ema_20
+            if self.count >= self.RSI_WINDOW:
+                rs = np.float64(self.gain_sum) / np.float64(self.loss_sum)
+                row['RSI'] = 100 - (100 / (1 + rs))
+            else:
+                row['RSI'] = np.nan
+            row['MACD'] = macd
+            row['MACD_Signal'] = self.macd_signal
+
+            row['Daily_Return'] = price / previous - 1
+            for period in self.FUTURE_PERIODS:
+                row[f'{period}D_Future_Return'] = np.nan
+            row['Price_ROC_5'] = (price / window[-5] - 1) * 100 if len(window) >= 5 else np.nan
+            row['Price_ROC_10'] = (price / window[-10] - 1) * 100 if len(window) >= 10 else np.nan
+
+            window.append(price)
+            if self.count >= 20:
+                std = float(np.std(np.fromiter(islice(reversed(window), 20), dtype=np.float64), ddof=1))
+            else:
+                std = np.nan
+            row['BB_Middle'] = row['SMA_20']
+            row['BB_StdDev'] = std
+            row['BB_Upper'] = row['BB_Middle'] + 2 * std
+            row['BB_Lower'] = row['BB_Middle'] - 2 * std
+            row['BB_Position'] = (price - row['BB_Lower']) / (row['BB_Upper'] - row['BB_Lower'])
+
+            # The new price completes the future returns of earlier pending rows
+            for period in self.FUTURE_PERIODS:
+                if len(self.pending) >= period:
+                    _, past = self.pending[-period]
+                    past[f'{period}D_Future_Return'] = price / past[self.price_col] - 1
+
+        completed = []
+        if len(self.pending) == max(self.FUTURE_PERIODS):
+            index, past = self.pending.popleft()
+            if not any(pd.isna(value) for value in past.values()):
+                completed.append((index, past))
+
+        self.pending.append((self.next_index, row))
+        self.next_index += 1
+        return completed
+
+    def update_frame(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """Append several raw bars in order and return the completed rows as a frame"""
+        completed = []
+        for bar in bars.to_dict('records'):
+            completed.extend(self.update(bar))
+        if not completed:
+            return pd.DataFrame(columns=list(bars.columns) + INDICATOR_COLUMNS)
+        index, rows = zip(*completed)
+        return pd.DataFrame(list(rows), index=list(index))
+
+    @staticmethod
+    def _ewm_step(current: float, value: float, span: int) -> float:
+        if np.isnan(current):
+            return value
+        alpha = 2.0 / (span + 1.0)
+        return current + alpha * (value - current)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persist the state so a restarted process can continue without a full rebuild"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> 'IncrementalIndicatorState':
+        """Load state previously written by save()"""
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def _ewm_continue(x: np.ndarray, span: int, last: float) -> np.ndarray:
+    """EWM of a 1-D chunk continuing from the previous chunk's final value (NaN = start of series)"""
+    if np.isnan(last):
+        return _ewm(x[:, None], span)[:, 0]
+    from scipy.signal import lfilter
+
+    alpha = 2.0 / (span + 1.0)
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * last])
+    return out
+
+
+class StreamingIndicators:
+    """
+    Chunked equivalent of add_technical_indicators for histories too large to hold in memory
+
+    Each chunk is computed with the previous chunk's last 50 prices as window
+    context and the final EWM values as seeds, so results match a full
+    recompute. Rows are emitted once their 30-day future return is known;
+    the last 30 rows of the stream never are, just as dropna() drops them.
+    """
+
+    CONTEXT = 50
+    HORIZON = 30
+
+    def __init__(self, price_col: str):
+        self.price_col = price_col
+        self.context = np.empty(0)
+        self.ema = {12: np.nan, 20: np.nan, 26: np.nan}
+        self.macd_signal = np.nan
+        self.held: Optional[pd.DataFrame] = None
+
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add indicators to the next cleaned, date-ordered chunk and return the rows now complete"""
+        prices = chunk[self.price_col].to_numpy(dtype=np.float64)
+        n_ctx = len(self.context)
+        ext = np.concatenate([self.context, prices])[:, None]
+
+        out = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sma_20 = _rolling_mean(ext, 20)
+            out['SMA_20'] = sma_20[n_ctx:, 0]
+            out['SMA_50'] = _rolling_mean(ext, 50)[n_ctx:, 0]
+
+            emas = {span: _ewm_continue(prices, span, self.ema[span]) for span in self.ema}
+            out['EMA_20'] = emas[20]
+
+            delta = ext - _shift(ext, 1)
+            gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+            loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+            out['RSI'] = (100 - (100 / (1 + gain / loss)))[n_ctx:, 0]
+
+            out['MACD'] = emas[12] - emas[26]
+            out['MACD_Signal'] = _ewm_continue(out['MACD'], 9, self.macd_signal)
+
+            out['Daily_Return'] = _pct_change(ext, 1)[n_ctx:, 0]
+            for period in (5, 10, 30):
+                out[f'{period}D_Future_Return'] = np.full(len(prices), np.nan)
+            out['Price_ROC_5'] = _pct_change(ext, 5)[n_ctx:, 0] * 100
+            out['Price_ROC_10'] = _pct_change(ext, 10)[n_ctx:, 0] * 100
+
+            out['BB_Middle'] = out['SMA_20']
+            out['BB_StdDev'] = _rolling_std(ext, 20, sma_20)[n_ctx:, 0]
+            out['BB_Upper'] = out['BB_Middle'] + (2 * out['BB_StdDev'])
+            out['BB_Lower'] = out['BB_Middle'] - (2 * out['BB_StdDev'])
+            out['BB_Position'] = (prices - out['BB_Lower']) / (out['BB_Upper'] - out['BB_Lower'])
+
+        if len(prices):
+            self.context = ext[-self.CONTEXT:, 0]
+            for span in self.ema:
+                self.ema[span] = emas[span][-1]
+            self.macd_signal = out['MACD_Signal'][-1]
+
+        frame = pd.concat([chunk, pd.DataFrame(out, index=chunk.index)], axis=1)
+        buffer = frame if self.held is None else pd.concat([self.held, frame])
+
+        # Future returns for everything buffered, now that later prices are known
+        buffered_prices = buffer[self.price_col].to_numpy(dtype=np.float64)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for period in (5, 10, 30):
+                buffer[f'{period}D_Future_Return'] = _shift(_pct_change(buffered_prices, period), -period)[:, 0]
+
+        self.held = buffer.iloc[-self.HORIZON:]
+        return buffer.iloc[:-self.HORIZON].dropna()
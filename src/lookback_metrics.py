@@ -0,0 +1,86 @@
+"""
+Multi-lookback performance metrics
+
+Returns, volatility, Sharpe ratio and max drawdown over several trailing
+windows (1W/1M/3M/6M/1Y/YTD) for every ticker. Each ticker's prices are
+turned into prefix sums of daily returns and squared returns once, so the
+mean and standard deviation of any trailing window are O(1) differences.
+Drawdowns need a running maximum that starts at each window's first price,
+so each lookback takes one pass over its own prices. Results go into a table
+with one row per ticker and one column per metric/lookback.
+"""
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Trailing windows in trading days; YTD is resolved from the dates
+LOOKBACKS = {'1W': 5, '1M': 21, '3M': 63, '6M': 126, '1Y': 252}
+TRADING_DAYS = 252
+
+METRIC_NAMES = ('return', 'volatility', 'sharpe', 'max_drawdown')
+
+
+def _ytd_days(dates: np.ndarray) -> int:
+    """Trading days since the last close of the previous year (or since the first row of this year)"""
+    years = dates.astype('datetime64[Y]')
+    first_this_year = int(np.searchsorted(years, years[-1]))
+    return len(dates) - 1 - max(first_this_year - 1, 0)
+
+
+def lookback_metrics(prices: np.ndarray, dates: Optional[np.ndarray] = None,
+                     lookbacks: Mapping[str, int] = LOOKBACKS) -> Dict[str, float]:
+    """
+    Metrics of one price series over every lookback, as {'<metric>_<lookback>': value}
+
+    A lookback longer than the history gives NaN. With dates, 'YTD' is added.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    windows = dict(lookbacks)
+    if dates is not None and len(dates):
+        windows['YTD'] = _ytd_days(np.asarray(dates, dtype='datetime64[ns]'))
+
+    daily = prices[1:] / prices[:-1] - 1
+    sums = np.concatenate([[0.0], np.cumsum(daily)])
+    squares = np.concatenate([[0.0], np.cumsum(daily * daily)])
+    n = len(daily)
+
+    results = {}
+    for label, days in windows.items():
+        if days < 1 or days > n:
+            results.update({f'{name}_{label}': np.nan for name in METRIC_NAMES})
+            continue
+        mean = (sums[n] - sums[n - days]) / days
+        variance = ((squares[n] - squares[n - days]) - days * mean * mean) / (days - 1) if days > 1 else np.nan
+        std = np.sqrt(max(variance, 0.0))
+        volatility = std * np.sqrt(TRADING_DAYS)
+
+        # The running maximum restarts at the window's first price
+        window = prices[-days - 1:]
+        drawdown = window / np.maximum.accumulate(window) - 1
+
+        results[f'return_{label}'] = prices[-1] / prices[-days - 1] - 1
+        results[f'volatility_{label}'] = volatility
+        results[f'sharpe_{label}'] = mean * TRADING_DAYS / volatility if volatility > 0 else 0.0
+        results[f'max_drawdown_{label}'] = drawdown.min()
+    return results
+
+
+def lookback_table(frames: Mapping[str, pd.DataFrame], price_col: Optional[str] = None,
+                   lookbacks: Mapping[str, int] = LOOKBACKS) -> pd.DataFrame:
+    """
+    Multi-lookback metrics for every ticker, one row per ticker
+
+    price_col defaults to 'Adj Close' where present, else 'Close'. Columns
+    are ordered metric by metric, each across the lookbacks.
+    """
+    records = {}
+    labels: Sequence[str] = list(lookbacks)
+    for ticker, data in frames.items():
+        column = price_col or ('Adj Close' if 'Adj Close' in data.columns else 'Close')
+        dates = data['Date'].to_numpy() if 'Date' in data.columns else None
+        records[ticker] = lookback_metrics(data[column].to_numpy(), dates, lookbacks)
+        if dates is not None and 'YTD' not in labels:
+            labels = [*labels, 'YTD']
+    columns = [f'{name}_{label}' for name in METRIC_NAMES for label in labels]
+    return pd.DataFrame.from_records(list(records.values()), index=list(records), columns=columns)
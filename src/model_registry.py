@@ -0,0 +1,95 @@
+import os
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+DEFAULT_REGISTRY_DIR = Path(__file__).resolve().parent / 'models'
+
+
+def training_data_hash(X: np.ndarray, y: np.ndarray) -> str:
+    """Content hash of a training set, used to tell whether a stored model is still valid"""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    On-disk store of fitted models and scalers
+
+    Entries are keyed by ticker, forecast period, feature list and a hash of
+    the training data, so a model is reused only when it would have been
+    trained on exactly the same inputs. Saving a new entry evicts older
+    entries for the same ticker and forecast period. Entries are written
+    uncompressed so that load() can memory-map the tree arrays.
+    """
+
+    def __init__(self, root: Union[str, Path, None] = None, mmap: bool = True):
+        self.root = Path(root or os.environ.get('MODEL_REGISTRY_DIR', DEFAULT_REGISTRY_DIR))
+        self.mmap = mmap
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(forecast_period: int, features: List[str], data_hash: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(str(forecast_period).encode())
+        digest.update('\0'.join(features).encode())
+        digest.update(data_hash.encode())
+        return digest.hexdigest()[:24]
+
+    def _ticker_dir(self, ticker: str) -> Path:
+        return self.root / ticker
+
+    def _entry_path(self, ticker: str, forecast_period: int, key: str) -> Path:
+        return self._ticker_dir(ticker) / f"{forecast_period}d-{key}.joblib"
+
+    def load(self, ticker: str, forecast_period: int, features: List[str], data_hash: str) -> Optional[Dict]:
+        """Return the stored entry (model, scaler, scores) for these inputs, or None"""
+        import joblib
+        path = self._entry_path(ticker, forecast_period, self.make_key(forecast_period, features, data_hash))
+        if not path.exists():
+            self.misses += 1
+            return None
+        try:
+            entry = joblib.load(path, mmap_mode='r' if self.mmap else None)
+        except Exception:
+            # A truncated or incompatible file is treated as a miss and replaced on save
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def save(self, ticker: str, forecast_period: int, features: List[str], data_hash: str,
+             model, scaler, **extra) -> Path:
+        """Store a fitted model and scaler, evicting stale entries for the same ticker and period"""
+        import joblib
+        key = self.make_key(forecast_period, features, data_hash)
+        path = self._entry_path(ticker, forecast_period, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {'model': model, 'scaler': scaler, 'features': list(features), 'data_hash': data_hash}
+        entry.update(extra)
+        tmp_path = path.with_suffix(f'.tmp{os.getpid()}')
+        joblib.dump(entry, tmp_path)
+        os.replace(tmp_path, path)
+
+        for stale in path.parent.glob(f"{forecast_period}d-*.joblib"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return path
+
+    def evict(self, ticker: Optional[str] = None) -> int:
+        """Remove every entry for a ticker, or the whole registry when ticker is None; returns files removed"""
+        dirs = [self._ticker_dir(ticker)] if ticker else [d for d in self.root.glob('*') if d.is_dir()]
+        removed = 0
+        for directory in dirs:
+            for path in directory.glob('*.joblib'):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,172 @@
+"""
+Incrementally updated return models
+
+A full RandomForest refit costs time proportional to the whole history, yet
+each day only adds a few newly labeled rows. IncrementalModel absorbs those
+rows instead:
+
+- kind='forest' grows trees_per_update new trees (warm_start) on the most
+  recent window of labeled rows and retires the same number of oldest trees,
+  so the forest size and the cost of an update stay constant. The scaler's
+  running statistics are updated with partial_fit and the retained trees'
+  split thresholds are moved to the new scaling, so they still split on the
+  same raw values. The OOB error is only computed on full refits: after an
+  update the retained trees' bootstrap samples no longer index the window.
+- kind='sgd' is an online linear learner: the scaler's running statistics
+  and the model are both updated with partial_fit on the new rows only.
+
+Either way a full refit happens every refit_every updates, or earlier when
+drift is detected: the new rows' feature means move more than
+drift_threshold standard deviations away from the retained recent window, or
+the error on the new rows exceeds error_ratio times the error measured at the
+last refit. Price-level features (moving averages, MACD) trend with the price
+and would always look shifted, so drift_features restricts the mean check to
+scale-free features such as returns, RSI or band position.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+INCREMENTAL_KINDS = ('forest', 'sgd')
+
+
+def _tail(rows, n: int):
+    return rows.iloc[-n:] if isinstance(rows, (pd.DataFrame, pd.Series)) else rows[-n:]
+
+
+def _append(rows, new_rows):
+    if isinstance(rows, (pd.DataFrame, pd.Series)):
+        return pd.concat([rows, new_rows])
+    return np.concatenate([rows, new_rows])
+
+
+class IncrementalModel:
+    """Return model that can be updated with newly labeled rows, with scheduled and drift-triggered refits"""
+
+    def __init__(self, kind: str = 'forest', n_estimators: int = 100, trees_per_update: int = 10,
+                 window: int = 250, refit_every: int = 20, drift_threshold: float = 2.0,
+                 error_ratio: float = 3.0, drift_features: Optional[Sequence] = None, random_state: int = 42):
+        if kind not in INCREMENTAL_KINDS:
+            raise ValueError(f"Unknown incremental model kind '{kind}'. Use one of {INCREMENTAL_KINDS}")
+        self.kind = kind
+        self.n_estimators = n_estimators
+        self.trees_per_update = min(trees_per_update, n_estimators)
+        self.window = window
+        self.refit_every = refit_every
+        self.drift_threshold = drift_threshold
+        self.error_ratio = error_ratio
+        # Column names (DataFrame input) or positions checked for a mean shift; None checks all
+        self.drift_features = list(drift_features) if drift_features is not None else None
+        self.random_state = random_state
+
+        self.model = None
+        self.scaler = None
+        self.updates_since_refit = 0
+        self.n_refits = 0
+        self.reference_error = None
+        self.last_drift = None
+        # Recent labeled rows kept for growing new trees
+        self._X_window = None
+        self._y_window = None
+
+    def _new_model(self):
+        if self.kind == 'forest':
+            from sklearn.ensemble import RandomForestRegressor
+            # Out-of-bag predictions give an honest reference error for drift checks
+            return RandomForestRegressor(n_estimators=self.n_estimators, random_state=self.random_state,
+                                         warm_start=True, oob_score=True)
+        from sklearn.linear_model import SGDRegressor
+        return SGDRegressor(random_state=self.random_state)
+
+    def fit(self, X, y) -> 'IncrementalModel':
+        """Full refit on all labeled rows (arrays or DataFrame/Series; feature names are kept on the scaler)"""
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler().fit(X)
+        X_scaled = self.scaler.transform(X)
+        y_values = np.asarray(y, dtype=np.float64)
+        self.model = self._new_model()
+        self.model.fit(X_scaled, y_values)
+
+        fitted = self.model.oob_prediction_ if self.kind == 'forest' else self.model.predict(X_scaled)
+        self.reference_error = float(np.mean(np.abs(fitted - y_values)))
+        self._X_window = _tail(X, self.window)
+        self._y_window = _tail(y, self.window)
+        self.updates_since_refit = 0
+        self.n_refits += 1
+        return self
+
+    def _rescale_trees(self, mean: np.ndarray, scale: np.ndarray) -> None:
+        """Move every tree's thresholds from the scaling (mean, scale) to the scaler's current one"""
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            split = tree.feature >= 0
+            features = tree.feature[split]
+            raw = tree.threshold[split] * scale[features] + mean[features]
+            tree.threshold[split] = (raw - self.scaler.mean_[features]) / self.scaler.scale_[features]
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.predict(self.scaler.transform(X))
+
+    def _drift_columns(self, X) -> np.ndarray:
+        if self.drift_features is None:
+            return np.asarray(X, dtype=np.float64)
+        if isinstance(X, pd.DataFrame):
+            return X[self.drift_features].to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64)[:, self.drift_features]
+
+    def drift(self, X_new, y_new) -> Dict[str, float]:
+        """Feature mean shift (in std units of the retained window) and error ratio of new rows against the last refit"""
+        reference = self._drift_columns(self._X_window)
+        std = reference.std(axis=0)
+        std = np.where(std > 0, std, 1.0)
+        shift = np.abs(self._drift_columns(X_new).mean(axis=0) - reference.mean(axis=0)) / std
+        error = float(np.mean(np.abs(self.predict(X_new) - np.asarray(y_new, dtype=np.float64))))
+        ratio = error / self.reference_error if self.reference_error else 0.0
+        return {'feature_shift': float(shift.max()) if shift.size else 0.0, 'error_ratio': ratio}
+
+    def update(self, X_new, y_new, X_all=None, y_all=None) -> str:
+        """
+        Absorb newly labeled rows, returning the action taken: 'update', 'refit' or 'skip'
+
+        X_all/y_all (the full labeled history) are used when a refit is due;
+        without them the refit uses the retained window plus the new rows.
+        """
+        if self.model is None:
+            raise ValueError("Model not fitted. Call fit() first.")
+        if len(y_new) == 0:
+            return 'skip'
+
+        self.last_drift = self.drift(X_new, y_new)
+        self._X_window = _tail(_append(self._X_window, X_new), self.window)
+        self._y_window = _tail(_append(self._y_window, y_new), self.window)
+
+        due = self.updates_since_refit + 1 >= self.refit_every
+        drifted = (self.last_drift['feature_shift'] > self.drift_threshold or
+                   self.last_drift['error_ratio'] > self.error_ratio)
+        if due or drifted:
+            if X_all is None:
+                X_all, y_all = self._X_window, self._y_window
+            self.fit(X_all, y_all)
+            return 'refit'
+
+        if self.kind == 'forest':
+            # Retire the oldest trees and grow the same number on the recent window
+            self.model.estimators_ = self.model.estimators_[self.trees_per_update:]
+            mean, scale = self.scaler.mean_.copy(), self.scaler.scale_.copy()
+            self.scaler.partial_fit(X_new)
+            self._rescale_trees(mean, scale)
+            self.model.n_estimators = len(self.model.estimators_) + self.trees_per_update
+            self.model.random_state = self.random_state + self.n_refits * 1000 + self.updates_since_refit + 1
+            # OOB rows would be drawn against the window for trees fit on earlier data; keep the refit's error
+            self.model.oob_score = False
+            self.model.fit(self.scaler.transform(self._X_window), np.asarray(self._y_window, dtype=np.float64))
+            for name in ('oob_score_', 'oob_prediction_'):
+                if hasattr(self.model, name):
+                    delattr(self.model, name)
+        else:
+            self.scaler.partial_fit(X_new)
+            self.model.partial_fit(self.scaler.transform(X_new), np.asarray(y_new, dtype=np.float64))
+        self.updates_since_refit += 1
+        return 'update'
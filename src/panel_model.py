@@ -0,0 +1,161 @@
+"""
+Pooled cross-ticker return model
+
+Instead of one RandomForest per ticker, PanelModel trains a single forest on
+the stacked feature rows of every ticker. Features are z-scored per ticker
+against that ticker's history up to each row (expanding mean and std), so
+price-level features such as SMA_20 become comparable across tickers without
+a row ever seeing later prices, and no per-ticker state has to be kept: the
+model is the forest alone. Its size is bounded by max_leaf_nodes per
+tree and each tree is grown on at most max_rows_per_tree bootstrap rows, so
+model memory and per-tree training cost stay constant as the universe grows.
+Training uses every core (n_jobs=-1) and the latest rows of all tickers are
+predicted with one batched call. backtest() scores the model out of sample
+with the same walk-forward splits as backtest.walk_forward_backtest, taken
+over the panel's dates.
+"""
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import walk_forward_splits
+
+# Rows of history a ticker needs before its features are normalized
+NORMALIZE_MIN_PERIODS = 20
+# Out-of-sample test blocks of a panel backtest when no test_size is given
+DEFAULT_BACKTEST_FOLDS = 5
+
+
+def normalize_features(data: pd.DataFrame, features: List[str],
+                       min_periods: int = NORMALIZE_MIN_PERIODS) -> np.ndarray:
+    """
+    Features z-scored with the ticker's expanding mean and std, as float32
+
+    Row t only uses rows up to t, so training rows never see later prices.
+    The first min_periods - 1 rows are NaN.
+    """
+    X = data[features].astype(np.float64)
+    expanding = X.expanding(min_periods=min_periods)
+    mean = expanding.mean().to_numpy()
+    std = expanding.std(ddof=0).to_numpy(copy=True)
+    std[std == 0] = 1.0
+    return ((X.to_numpy() - mean) / std).astype(np.float32)
+
+
+class PanelModel:
+    """One return model for a whole universe, trained on the stacked per-ticker normalized panel"""
+
+    def __init__(self, features: List[str], forecast_period: int = 10, n_estimators: int = 100,
+                 max_leaf_nodes: int = 1024, max_rows_per_tree: int = 200_000, n_jobs: int = -1,
+                 random_state: int = 42):
+        self.features = list(features)
+        self.forecast_period = forecast_period
+        self.n_estimators = n_estimators
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_rows_per_tree = max_rows_per_tree
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.model = None
+        self.n_tickers = 0
+        self.n_rows = 0
+
+    @property
+    def target(self) -> str:
+        return f'{self.forecast_period}D_Future_Return'
+
+    def _panel(self, frames: Mapping[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray, Dict[str, slice], np.ndarray]:
+        """
+        Stack normalized features and targets of every ticker; slices map tickers to their rows
+
+        The last array holds each row's position among the panel's sorted
+        dates (the Date column, or the row's distance from the end of its
+        ticker's history when a frame has none).
+        """
+        blocks, targets, keys, spans = [], [], [], {}
+        dated = all('Date' in data.columns for data in frames.values())
+        offset = 0
+        for ticker, data in frames.items():
+            X = normalize_features(data, self.features)
+            y = data[self.target].to_numpy(dtype=np.float64)
+            valid = np.isfinite(X).all(axis=1) & np.isfinite(y)
+            key = (pd.to_datetime(data['Date']).to_numpy(dtype='datetime64[ns]') if dated
+                   else np.arange(len(data)) - len(data))
+            blocks.append(X[valid])
+            targets.append(y[valid])
+            keys.append(key[valid])
+            spans[ticker] = slice(offset, offset + int(valid.sum()))
+            offset += int(valid.sum())
+        if not offset:
+            raise ValueError("No labeled rows to train the panel model on")
+        times = np.unique(np.concatenate(keys), return_inverse=True)[1]
+        return np.concatenate(blocks), np.concatenate(targets), spans, times
+
+    def _forest(self, n_rows: int):
+        from sklearn.ensemble import RandomForestRegressor
+
+        max_samples = self.max_rows_per_tree if n_rows > self.max_rows_per_tree else None
+        return RandomForestRegressor(n_estimators=self.n_estimators, max_leaf_nodes=self.max_leaf_nodes,
+                                     max_samples=max_samples, n_jobs=self.n_jobs, random_state=self.random_state)
+
+    def fit(self, frames: Mapping[str, pd.DataFrame]) -> 'PanelModel':
+        """Fit the pooled forest on every ticker's labeled rows"""
+        X, y, spans, _ = self._panel(frames)
+        self.model = self._forest(len(y)).fit(X, y)
+        self.n_tickers = len(spans)
+        self.n_rows = len(y)
+        return self
+
+    def predict_latest(self, frames: Mapping[str, pd.DataFrame]) -> Dict[str, float]:
+        """Predicted return of every ticker from its latest row, in one batched predict"""
+        if self.model is None:
+            raise ValueError("Model not trained. Call fit() first.")
+        tickers = list(frames)
+        latest = np.stack([normalize_features(frames[ticker], self.features)[-1] for ticker in tickers])
+        return dict(zip(tickers, self.model.predict(latest).tolist()))
+
+    def backtest(self, frames: Mapping[str, pd.DataFrame], test_size: Optional[int] = None,
+                 min_train_size: int = 100, window: str = 'expanding', train_size: Optional[int] = None,
+                 refit_every: int = 1) -> Dict[str, Dict[str, float]]:
+        """
+        Per-ticker directional accuracy, correlation and MAE of out-of-sample walk-forward predictions
+
+        The panel's dates are split with backtest.walk_forward_splits (a gap
+        of forecast_period dates between train and test); each group's forest
+        is fit on the rows of its training dates only and predicts the rows of
+        its test blocks. test_size defaults to the out-of-sample dates split
+        into DEFAULT_BACKTEST_FOLDS blocks. Tickers with no out-of-sample rows
+        get NaN metrics.
+        """
+        X, y, spans, times = self._panel(frames)
+        n_dates = int(times.max()) + 1
+        if test_size is None:
+            test_size = max(1, -(-(n_dates - min_train_size - self.forecast_period) // DEFAULT_BACKTEST_FOLDS))
+        groups = walk_forward_splits(n_dates, test_size, min_train_size, gap=self.forecast_period,
+                                     window=window, train_size=train_size, refit_every=refit_every)
+        if not groups:
+            raise ValueError(f"Not enough dates ({n_dates}) for a walk-forward backtest "
+                             f"with min_train_size={min_train_size} and gap={self.forecast_period}")
+
+        predictions = np.full(len(y), np.nan)
+        for train, tests in groups:
+            train_rows = (times >= train.start) & (times < train.stop)
+            test_rows = (times >= tests[0].start) & (times < tests[-1].stop)
+            if train_rows.any() and test_rows.any():
+                model = self._forest(int(train_rows.sum())).fit(X[train_rows], y[train_rows])
+                predictions[test_rows] = model.predict(X[test_rows])
+
+        results = {}
+        for ticker, rows in spans.items():
+            pred, actual = predictions[rows], y[rows]
+            scored = np.isfinite(pred)
+            pred, actual = pred[scored], actual[scored]
+            if not len(actual):
+                results[ticker] = {'directional_accuracy': np.nan, 'correlation': np.nan, 'mae': np.nan}
+                continue
+            results[ticker] = {
+                'directional_accuracy': np.mean(np.sign(pred) == np.sign(actual)) * 100,
+                'correlation': np.corrcoef(pred, actual)[0, 1] if len(actual) > 1 else np.nan,
+                'mae': np.mean(np.abs(pred - actual))
+            }
+        return results
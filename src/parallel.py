@@ -0,0 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Normalise a worker count: None or <= 0 means one per CPU, capped at the CPU count"""
+    cpu_count = os.cpu_count() or 1
+    if workers is None or workers <= 0:
+        return cpu_count
+    return min(workers, cpu_count)
+
+
+def parallel_map(func: Callable[[T], R], items: Iterable[T], workers: Optional[int] = 1,
+                 initializer: Optional[Callable[..., None]] = None, initargs: Tuple = ()) -> List[R]:
+    """
+    Apply func to every item, fanning out over a process pool when workers > 1
+
+    Results are returned in input order regardless of completion order, so
+    callers get the same output as a sequential loop. func must be a
+    module-level callable and is expected to handle its own per-item errors.
+    initializer(*initargs) runs once in every worker (or once in this process
+    when running sequentially), so data shared by all items is sent once per
+    worker instead of once per item.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [func(item) for item in items]
+
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
@@ -1,18 +1,48 @@
 import os
+import time
+import pickle
+import hashlib
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
 from datetime import datetime, timedelta
 
+from parallel import parallel_map
+from columnar_store import available_columns, dataset_source, list_datasets, load_frame
+from indicators import IncrementalIndicatorState, StreamingIndicators, add_panel_indicators
+from streaming import DEFAULT_MEMORY_BUDGET_MB, chunksize_for_budget, is_date_sorted, iter_clean_chunks
+from model_registry import DEFAULT_REGISTRY_DIR, ModelRegistry, training_data_hash
+from backtest import walk_forward_backtest
+from frame_memory import compact_frame, memory_report
+from startup_snapshot import load_snapshot, save_snapshot
+from online_model import IncrementalModel
+from panel_model import PanelModel
+from lookback_metrics import LOOKBACKS, lookback_metrics, lookback_table
+
+# Features used by the return prediction model
+PREDICTION_FEATURES = [
+    'SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_Signal', 
+    'Daily_Return', 'Price_ROC_5', 'Price_ROC_10', 'BB_Position'
+]
+
+# Scale-free features used for incremental model drift checks; the rest trend with the price level
+DRIFT_FEATURES = ['RSI', 'Daily_Return', 'Price_ROC_5', 'Price_ROC_10', 'BB_Position']
+
+# Future return horizons (in days) computed by add_technical_indicators
+FORECAST_HORIZONS = (5, 10, 30)
+
+def predicted_return_key(horizon):
+    """Metrics key holding a ticker's predicted return over the given horizon"""
+    return f'predicted_{horizon}d_return'
+
 class StockDataProcessor:
     """Process and prepare stock data for analysis"""
     
     def __init__(self, data_path=None):
         self.data_path = data_path
         self.data = None
+        self.indicator_state = None
+        self.compact = False
         
     def load_data(self, data_path=None):
         """Load stock data from CSV file"""
@@ -23,9 +53,9 @@ class StockDataProcessor:
             raise ValueError("Data path not provided")
         
         try:
-            self.data = pd.read_csv(self.data_path)
-            # Convert date column to datetime
-            if 'Date' in self.data.columns:
+            self.data = load_frame(self.data_path)
+            # Convert date column to datetime (columnar loads are already typed)
+            if 'Date' in self.data.columns and not pd.api.types.is_datetime64_any_dtype(self.data['Date']):
                 self.data['Date'] = pd.to_datetime(self.data['Date'])
             
             # Verify all required columns are present
@@ -50,25 +80,70 @@ class StockDataProcessor:
             # Fill missing values or drop rows with missing values
             self.data = self.data.dropna()
             
-        # Sort by date if available
-        if 'Date' in self.data.columns:
+        # Sort by date if available (skipped when the file is already in date order)
+        if 'Date' in self.data.columns and not self.data['Date'].is_monotonic_increasing:
             self.data = self.data.sort_values('Date')
             
         return self.data
     
-    def add_technical_indicators(self, use_adj_close=True):
+    def iter_processed_chunks(self, use_adj_close=True, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, columns=None):
+        """
+        Stream load -> clean -> indicators in bounded memory, yielding processed chunks
+        
+        Parameters:
+        use_adj_close (bool): Whether to use Adjusted Close price for calculations (default: True)
+        memory_budget_mb (float): Approximate peak memory for one chunk in flight (default: 64)
+        columns (list): Raw columns to read; defaults to all columns
+        
+        Files that are not in date order cannot be streamed; they are loaded,
+        sorted and processed in memory instead, and yielded as one chunk.
+        """
+        if self.data_path is None:
+            raise ValueError("Data path not provided")
+        
+        chunksize = chunksize_for_budget(memory_budget_mb)
+        if not is_date_sorted(self.data_path, chunksize):
+            print(f"Warning: {self.data_path} is not sorted by date; processing in memory")
+            self.load_data()
+            self.clean_data()
+            yield self.add_technical_indicators(use_adj_close=use_adj_close)
+            return
+        
+        file_columns = available_columns(self.data_path)
+        if columns is not None:
+            file_columns = [col for col in file_columns if col in set(columns)]
+        price_col = 'Adj Close' if use_adj_close and 'Adj Close' in file_columns else 'Close'
+        
+        engine = StreamingIndicators(price_col)
+        for chunk in iter_clean_chunks(self.data_path, chunksize, columns):
+            processed = engine.process(chunk)
+            if not processed.empty:
+                yield processed
+    
+    def load_streaming(self, use_adj_close=True, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, columns=None):
+        """Run iter_processed_chunks() and keep the concatenated result as self.data"""
+        chunks = list(self.iter_processed_chunks(use_adj_close, memory_budget_mb, columns))
+        self.data = pd.concat(chunks) if chunks else None
+        return self.data
+    
+    def add_technical_indicators(self, use_adj_close=True, incremental=False, verbose=True, compact=False):
         """
         Add technical indicators to the dataset
         
         Parameters:
         use_adj_close (bool): Whether to use Adjusted Close price for calculations (default: True)
+        incremental (bool): Keep rolling/EWM state so later bars can be added with
+                            update_technical_indicators() instead of a full recompute (default: False)
+        verbose (bool): Print progress messages (default: True)
+        compact (bool): Store the result in the compact float32 layout (default: False)
         """
         if self.data is None:
             raise ValueError("Data not loaded. Call load_data() first.")
         
         # Choose price column based on parameter
         price_col = 'Adj Close' if use_adj_close and 'Adj Close' in self.data.columns else 'Close'
-        print(f"Using {price_col} prices for technical indicators")
+        if verbose:
+            print(f"Using {price_col} prices for technical indicators")
         
         # Simple Moving Average (SMA)
         self.data['SMA_20'] = self.data[price_col].rolling(window=20).mean()
@@ -110,22 +185,91 @@ class StockDataProcessor:
         # Percentage difference from Bollinger Bands
         self.data['BB_Position'] = (self.data[price_col] - self.data['BB_Lower']) / (self.data['BB_Upper'] - self.data['BB_Lower'])
         
+        if incremental:
+            self.indicator_state = IncrementalIndicatorState.from_frame(self.data, price_col)
+        
         # Drop NaN values after creating indicators
         self.data = self.data.dropna()
         
+        self.compact = compact
+        if compact:
+            self.data = compact_frame(self.data)
+        
+        return self.data
+    
+    def update_technical_indicators(self, new_bars):
+        """
+        Append new raw bars using the incremental indicator state
+        
+        Parameters:
+        new_bars (DataFrame): Raw rows (Date, Open, ..., Volume) following the existing history
+        
+        Rows are added to the processed data once their future returns are known,
+        so the result matches a full add_technical_indicators() recompute.
+        """
+        if self.indicator_state is None:
+            raise ValueError("Incremental state not available. Call add_technical_indicators(incremental=True) or load_indicator_state() first.")
+        
+        completed = self.indicator_state.update_frame(new_bars)
+        if self.compact:
+            completed = compact_frame(completed)
+        if self.data is None:
+            self.data = completed
+        elif not completed.empty:
+            self.data = pd.concat([self.data, completed])
         return self.data
+    
+    def save_indicator_state(self, path):
+        """Persist the incremental indicator state"""
+        if self.indicator_state is None:
+            raise ValueError("Incremental state not available. Call add_technical_indicators(incremental=True) first.")
+        self.indicator_state.save(path)
+    
+    def load_indicator_state(self, path):
+        """Restore incremental indicator state written by save_indicator_state()"""
+        self.indicator_state = IncrementalIndicatorState.load(path)
+        return self.indicator_state
+    
+    @staticmethod
+    def add_technical_indicators_panel(frames, use_adj_close=True, compact=False):
+        """
+        Add technical indicators to many cleaned frames at once
+        
+        Parameters:
+        frames (dict): Mapping of ticker to cleaned DataFrame
+        use_adj_close (bool): Whether to use Adjusted Close price for calculations (default: True)
+        compact (bool): Store the results in the compact float32 layout (default: False)
+        
+        Returns a new dict of frames with the same column layout as add_technical_indicators.
+        """
+        frames = add_panel_indicators(frames, use_adj_close=use_adj_close)
+        if compact:
+            frames = {ticker: compact_frame(df) for ticker, df in frames.items()}
+        return frames
 
 class StockAnalyzer:
     """Analyze stock data to extract insights"""
     
-    def __init__(self, data):
+    def __init__(self, data, ticker=None, model_registry=None, prices=None):
+        """
+        Parameters:
+        data (DataFrame): Processed frame with indicator and future-return columns
+        prices (DataFrame): Cleaned price history before indicators are added, whose
+                            last row is the latest close (default: None, use data)
+        """
         self.data = data
+        self.prices = prices
+        self.ticker = ticker
+        self.model_registry = model_registry
         self.model = None
+        self.horizon_model = None
+        self.horizons = ()
+        self.incremental_model = None
         self.use_adj_close = 'Adj Close' in data.columns
         self.price_col = 'Adj Close' if self.use_adj_close else 'Close'
         
-    def calculate_performance_metrics(self, ticker=None):
-        """Calculate key performance metrics"""
+    def calculate_performance_metrics(self, ticker=None, verbose=True):
+        """Calculate key performance metrics, printing a summary unless verbose is False"""
         metrics = {}
         
         # Return metrics
@@ -165,63 +309,185 @@ class StockAnalyzer:
         metrics['return_last_week'] = self.data[self.price_col].iloc[-1] / self.data[self.price_col].iloc[-min_periods] - 1
         
         # Print summary
-        print(f"\nPerformance Metrics{' for ' + ticker if ticker else ''}:")
-        for metric, value in metrics.items():
-            print(f"{metric.replace('_', ' ').title()}: {value:.4f}")
+        if verbose:
+            print(f"\nPerformance Metrics{' for ' + ticker if ticker else ''}:")
+            for metric, value in metrics.items():
+                print(f"{metric.replace('_', ' ').title()}: {value:.4f}")
             
         return metrics
     
-    def build_prediction_model(self, forecast_period=10):
-        """Build a model to predict future returns"""
-        # Prepare features and target
-        features = [
-            'SMA_20', 'SMA_50', 'EMA_20', 'RSI', 'MACD', 'MACD_Signal', 
-            'Daily_Return', 'Price_ROC_5', 'Price_ROC_10', 'BB_Position'
-        ]
-        target = f'{forecast_period}D_Future_Return'
+    def calculate_lookback_metrics(self, lookbacks=LOOKBACKS):
+        """
+        Return, volatility, Sharpe and max drawdown over each lookback (and YTD), without printing
+        
+        Windows end at the latest close of the price history. The processed
+        data is only a fallback: its future-return columns drop the last 30 bars.
+        """
+        prices = self.prices if self.prices is not None else self.data
+        dates = prices['Date'].to_numpy() if 'Date' in prices.columns else None
+        return lookback_metrics(prices[self.price_col].to_numpy(), dates, lookbacks)
+    
+    def _model_features(self, targets, verbose=True):
+        """Available prediction features, after checking that every target column exists"""
+        features = list(PREDICTION_FEATURES)
         
         # Ensure all features are available
         missing_features = [f for f in features if f not in self.data.columns]
         if missing_features:
-            print(f"Warning: Missing features: {missing_features}")
+            if verbose:
+                print(f"Warning: Missing features: {missing_features}")
             features = [f for f in features if f in self.data.columns]
             
         if not features:
             raise ValueError("No valid features available for model training")
-            
-        if target not in self.data.columns:
-            raise ValueError(f"Target column '{target}' not found in data")
         
-        X = self.data[features]
-        y = self.data[target]
+        for target in targets:
+            if target not in self.data.columns:
+                raise ValueError(f"Target column '{target}' not found in data")
+        return features
+    
+    def build_prediction_model(self, forecast_period=10, verbose=True):
+        """Build a model to predict future returns, printing its scores unless verbose is False"""
+        # Prepare features and target
+        target = f'{forecast_period}D_Future_Return'
+        features = self._model_features([target], verbose)
         
-        # Scale features
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        model, scaler = self._fit_model(features, self.data[target], forecast_period, verbose)
         
-        # Split into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+        # Store the model for later use
+        self.model = model
+        self.forecast_period = forecast_period
+        self.feature_list = features
+        self.scaler = scaler
         
-        # Train a Random Forest model
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        return model
+    
+    def build_multi_horizon_model(self, horizons=FORECAST_HORIZONS, verbose=True):
+        """
+        Build one multi-output model predicting the future return of every horizon at once
         
-        # Evaluate the model
-        train_score = model.score(X_train, y_train)
-        test_score = model.score(X_test, y_test)
+        Features are scaled once and a single forest is fitted on all targets,
+        so the trees, splits and bootstrap samples are shared across horizons.
         
-        print(f"\nModel R² (Training): {train_score:.4f}")
-        print(f"Model R² (Testing): {test_score:.4f}")
+        Parameters:
+        horizons (tuple): Forecast periods in days, each with a '<n>D_Future_Return' column (default: (5, 10, 30))
+        verbose (bool): Print the model's scores (default: True)
+        """
+        horizons = tuple(horizons)
+        targets = [f'{horizon}D_Future_Return' for horizon in horizons]
+        features = self._model_features(targets, verbose)
         
-        # Store the model for later use
-        self.model = model
-        self.forecast_period = forecast_period
+        # Registry entries for the combined model are keyed by all of its horizons
+        registry_key = '-'.join(str(horizon) for horizon in horizons)
+        model, scaler = self._fit_model(features, self.data[targets], registry_key, verbose)
+        
+        self.horizon_model = model
+        self.horizons = horizons
         self.feature_list = features
         self.scaler = scaler
         
         return model
     
-    def predict_future_return(self):
+    def _fit_model(self, features, y, registry_key, verbose=True):
+        """Fit (or load from the registry) a scaled RandomForest on the given features and target(s)"""
+        X = self.data[features]
+        
+        # Reuse a stored model trained on exactly these inputs, if any
+        use_registry = self.model_registry is not None and self.ticker is not None
+        if use_registry:
+            data_hash = training_data_hash(X.to_numpy(), y.to_numpy())
+            entry = self.model_registry.load(self.ticker, registry_key, features, data_hash)
+            if entry is not None:
+                model, scaler = entry['model'], entry['scaler']
+                train_score, test_score = entry['train_score'], entry['test_score']
+                if verbose:
+                    print(f"\nLoaded cached model for {self.ticker}")
+        
+        if not use_registry or entry is None:
+            # scikit-learn is imported on first fit; it dominates import time otherwise
+            from sklearn.preprocessing import StandardScaler
+            from sklearn.model_selection import train_test_split
+            from sklearn.ensemble import RandomForestRegressor
+            
+            # Scale features
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
+            
+            # Split into training and testing sets
+            X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+            
+            # Train a Random Forest model
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            model.fit(X_train, y_train)
+            
+            # Evaluate the model
+            train_score = model.score(X_train, y_train)
+            test_score = model.score(X_test, y_test)
+            
+            if use_registry:
+                self.model_registry.save(self.ticker, registry_key, features, data_hash, model, scaler,
+                                         train_score=train_score, test_score=test_score)
+        
+        if verbose:
+            print(f"\nModel R² (Training): {train_score:.4f}")
+            print(f"Model R² (Testing): {test_score:.4f}")
+        
+        return model, scaler
+    
+    def build_incremental_model(self, forecast_period=10, kind='forest', verbose=True, **params):
+        """
+        Fit a model that update_prediction_model() can extend with new rows instead of refitting
+        
+        Parameters:
+        forecast_period (int): Horizon of the future return target (default: 10)
+        kind (str): 'forest' (warm-start RandomForest) or 'sgd' (online linear model) (default: 'forest')
+        verbose (bool): Print progress messages (default: True)
+        **params: Passed to IncrementalModel (trees_per_update, window, refit_every, drift_threshold, ...)
+        """
+        features = [f for f in PREDICTION_FEATURES if f in self.data.columns]
+        target = f'{forecast_period}D_Future_Return'
+        if not features:
+            raise ValueError("No valid features available for model training")
+        if target not in self.data.columns:
+            raise ValueError(f"Target column '{target}' not found in data")
+        
+        params.setdefault('drift_features', [f for f in DRIFT_FEATURES if f in features])
+        self.incremental_model = IncrementalModel(kind=kind, **params).fit(self.data[features], self.data[target])
+        self._use_incremental_model(forecast_period, features)
+        if verbose:
+            print(f"\nFitted incremental {kind} model on {len(self.data)} rows")
+        return self.incremental_model
+    
+    def update_prediction_model(self, new_rows, verbose=True):
+        """
+        Append newly labeled processed rows and update the incremental model with only those rows
+        
+        Falls back to a full refit when one is scheduled or drift is detected.
+        Returns the action taken: 'update', 'refit' or 'skip'.
+        """
+        if self.incremental_model is None:
+            raise ValueError("Incremental model not built. Call build_incremental_model() first.")
+        
+        target = f'{self.forecast_period}D_Future_Return'
+        new_rows = new_rows.dropna(subset=self.feature_list + [target])
+        self.data = pd.concat([self.data, new_rows]) if not new_rows.empty else self.data
+        action = self.incremental_model.update(
+            new_rows[self.feature_list], new_rows[target],
+            self.data[self.feature_list], self.data[target]
+        )
+        self._use_incremental_model(self.forecast_period, self.feature_list)
+        if verbose:
+            print(f"\nIncremental model {action} with {len(new_rows)} new rows")
+        return action
+    
+    def _use_incremental_model(self, forecast_period, features):
+        # predict_future_return and backtest_model read the model and scaler from these attributes
+        self.model = self.incremental_model.model
+        self.scaler = self.incremental_model.scaler
+        self.feature_list = list(features)
+        self.forecast_period = forecast_period
+    
+    def predict_future_return(self, verbose=True):
         """Predict future return using the trained model"""
         if self.model is None:
             raise ValueError("Model not trained. Call build_prediction_model() first.")
@@ -235,10 +501,25 @@ class StockAnalyzer:
         # Make prediction
         predicted_return = self.model.predict(latest_data_scaled)[0]
         
-        print(f"\nPredicted {self.forecast_period}-day return: {predicted_return:.4f} ({predicted_return * 100:.2f}%)")
+        if verbose:
+            print(f"\nPredicted {self.forecast_period}-day return: {predicted_return:.4f} ({predicted_return * 100:.2f}%)")
         
         return predicted_return
     
+    def predict_future_returns(self, verbose=True):
+        """Predict the future return of every horizon with one call to the multi-horizon model"""
+        if self.horizon_model is None:
+            raise ValueError("Model not trained. Call build_multi_horizon_model() first.")
+        
+        latest_data_scaled = self.scaler.transform(self.data[self.feature_list].iloc[-1:])
+        predicted = dict(zip(self.horizons, self.horizon_model.predict(latest_data_scaled).reshape(-1)))
+        
+        if verbose:
+            for horizon, predicted_return in predicted.items():
+                print(f"Predicted {horizon}-day return: {predicted_return:.4f} ({predicted_return * 100:.2f}%)")
+        
+        return predicted
+    
     def backtest_model(self, forecast_period=10):
         """Backtest the prediction model on historical data"""
         if self.model is None:
@@ -257,6 +538,22 @@ class StockAnalyzer:
         # Make predictions on all data
         predictions = self.model.predict(X_scaled)
         
+        return self._prediction_accuracy(predictions, y)
+    
+    def backtest_multi_horizon_model(self):
+        """Backtest every horizon of the multi-horizon model with one predict over the history"""
+        if self.horizon_model is None:
+            raise ValueError("Model not trained. Call build_multi_horizon_model() first.")
+        
+        predictions = self.horizon_model.predict(self.scaler.transform(self.data[self.feature_list]))
+        predictions = predictions.reshape(len(self.data), len(self.horizons))
+        return {
+            horizon: self._prediction_accuracy(predictions[:, i], self.data[f'{horizon}D_Future_Return'])
+            for i, horizon in enumerate(self.horizons)
+        }
+    
+    @staticmethod
+    def _prediction_accuracy(predictions, y):
         # Calculate directional accuracy
         correct_direction = np.sign(predictions) == np.sign(y)
         directional_accuracy = np.mean(correct_direction) * 100
@@ -275,8 +572,37 @@ class StockAnalyzer:
             'actuals': y.values
         }
     
+    def walk_forward_backtest(self, forecast_period=10, test_size=20, min_train_size=100,
+                              window='expanding', train_size=None, refit_every=1, n_workers=1):
+        """
+        Out-of-sample walk-forward backtest of the prediction model
+        
+        Parameters:
+        forecast_period (int): Horizon of the future return target (default: 10)
+        test_size (int): Rows per out-of-sample fold (default: 20)
+        min_train_size (int): Rows in the first training window (default: 100)
+        window (str): 'expanding' or 'rolling' training window (default: 'expanding')
+        train_size (int): Rolling window length (default: min_train_size)
+        refit_every (int): Number of folds scored by each fitted model (default: 1)
+        n_workers (int): Worker processes used to run folds in parallel (default: 1)
+        
+        Returns a dict of per-fold arrays (directional_accuracy, correlation, mae and fold bounds).
+        """
+        features = getattr(self, 'feature_list', None) or [f for f in PREDICTION_FEATURES if f in self.data.columns]
+        target = f'{forecast_period}D_Future_Return'
+        if target not in self.data.columns:
+            raise ValueError(f"Target column '{target}' not found in data")
+        
+        return walk_forward_backtest(
+            self.data[features].to_numpy(), self.data[target].to_numpy(),
+            forecast_period=forecast_period, test_size=test_size, min_train_size=min_train_size,
+            window=window, train_size=train_size, refit_every=refit_every, n_workers=n_workers
+        )
+    
     def plot_predictions_vs_actuals(self):
         """Plot predictions vs actual returns for visual evaluation"""
+        import matplotlib.pyplot as plt
+        
         backtest = self.backtest_model()
         plt.figure(figsize=(10, 6))
         plt.scatter(backtest['actuals'], backtest['predictions'], alpha=0.5)
@@ -291,32 +617,36 @@ class StockAnalyzer:
 class StockRecommender:
     """Generate stock buy recommendations based on analysis"""
     
-    def __init__(self, stock_data_dict=None):
+    def __init__(self, stock_data_dict=None, n_workers=1, model_registry=None, pooled_model=False,
+                 horizon=10, horizons=None):
+        """
+        Parameters:
+        horizon (int): Forecast period in days that recommendations are scored on (default: 10)
+        horizons (tuple): Fit one multi-horizon model per ticker predicting all of these forecast
+                          periods, which must include horizon (default: None, a single-horizon model)
+        """
+        if horizons is not None and horizon not in horizons:
+            raise ValueError(f"Scoring horizon {horizon} is not one of the modelled horizons {tuple(horizons)}")
         self.stock_data = stock_data_dict or {}
+        self.price_history = {}
         self.stock_analyzers = {}
         self.recommendations = {}
+        self.n_workers = n_workers
+        self.model_registry = model_registry
+        self.pooled_model = pooled_model
+        self.horizon = horizon
+        self.horizons = tuple(horizons) if horizons is not None else None
+        self.panel_model = None
     
-    def add_stock_data(self, ticker, data):
-        """Add processed stock data for a ticker"""
+    def add_stock_data(self, ticker, data, prices=None):
+        """Add processed stock data for a ticker, plus its cleaned price history for lookback metrics"""
         self.stock_data[ticker] = data
-        self.stock_analyzers[ticker] = StockAnalyzer(data)
+        if prices is not None:
+            self.price_history[ticker] = prices
+        self.stock_analyzers[ticker] = StockAnalyzer(data, ticker=ticker, model_registry=self.model_registry,
+                                                     prices=prices)
         return self.stock_analyzers[ticker]
     
-    def analyze_all_stocks(self):
-        """Analyze all stocks and compile metrics"""
-        all_metrics = {}
-        
-        for ticker, analyzer in self.stock_analyzers.items():
-            metrics = analyzer.calculate_performance_metrics(ticker)
-            all_metrics[ticker] = metrics
-            
-            # Build prediction model
-            analyzer.build_prediction_model(forecast_period=10)
-            predicted_return = analyzer.predict_future_return()
-            all_metrics[ticker]['predicted_10d_return'] = predicted_return
-        
-        return all_metrics
-    
     def generate_recommendations(self, top_n=5):
         """Generate buy recommendations based on analysis"""
         if not self.stock_analyzers:
@@ -324,57 +654,33 @@ class StockRecommender:
         
         # Analyze all stocks
         metrics = self.analyze_all_stocks()
+        return self.rank_recommendations(metrics, top_n)
+    
+    def rank_recommendations(self, metrics, top_n=5):
+        """
+        Score, filter and rank already computed per-ticker metrics
         
-        # Score each stock based on key metrics
-        scores = {}
-        for ticker, ticker_metrics in metrics.items():
-            # Enhanced scoring system with better weighting
-            score = (
-                ticker_metrics['predicted_10d_return'] * 5 +  # Much higher weight for predicted return
-                ticker_metrics['sharpe_ratio'] * 0.5 +  # Reduced weight for Sharpe ratio
-                ticker_metrics['return_last_week'] * 0.5 +  # Reduced weight for recent performance
-                (1 if ticker_metrics['sma_20_ratio'] > 1 else -1) * 0.5 +
-                (1 if ticker_metrics['sma_50_ratio'] > 1 else -1) * 0.5 +
-                
-                # Stronger RSI logic
-                (-2 if ticker_metrics['current_rsi'] > 70 else  # Strong penalty for overbought
-                 1 if ticker_metrics['current_rsi'] < 30 else 0) +  # Bonus for oversold
-                
-                (1 if ticker_metrics['macd_signal'] > 0 else -1) * 0.5 +
-                (1 if 0.2 < ticker_metrics.get('bb_position', 0.5) < 0.8 else -1) * 0.3 +
-                
-                # Additional factors
-                (1 if ticker_metrics['annual_return'] > 0 else -1) * 0.5  # Favor positive annual returns
-            )
-            
-            # Additional penalties
-            if ticker_metrics['predicted_10d_return'] < 0:
-                score -= 3  # Strong penalty for negative predicted returns
-            
-            if ticker_metrics['current_rsi'] > 75:
-                score -= 2  # Additional penalty for severely overbought
-            
-            scores[ticker] = score
-        
-        # Filter out fundamentally poor candidates
-        filtered_scores = {
-            ticker: score for ticker, score in scores.items()
-            if (metrics[ticker]['predicted_10d_return'] > 0 and  # Only positive predictions
-                metrics[ticker]['current_rsi'] < 75 and  # Not severely overbought
-                metrics[ticker]['sharpe_ratio'] > 0)  # Positive risk-adjusted return
-        }
+        metrics is a {ticker: metrics dict} mapping or a metrics table with one
+        row per ticker (see metrics_table). Scores and filters are computed
+        for the whole table at once, the top N are picked with a partial sort
+        and only those are formatted.
+        """
+        table = metrics if isinstance(metrics, pd.DataFrame) else self.metrics_table(metrics)
         
-        # Rank stocks based on filtered scores
-        ranked_stocks = sorted(filtered_scores.items(), key=lambda x: x[1], reverse=True)
+        # Score each stock based on key metrics, then filter out fundamentally poor candidates
+        scores = self.score_table(table, self.horizon)
+        candidates = np.flatnonzero(self.filter_table(table, self.horizon))
         
-        # Get top N recommendations
-        top_recommendations = ranked_stocks[:min(top_n, len(ranked_stocks))]
+        # Get top N recommendations, ties keeping table order
+        top = self.top_n_indices(scores[candidates], top_n)
         
         # Format recommendations
         recommendations = []
-        for ticker, score in top_recommendations:
+        for position in candidates[top]:
+            ticker = table.index[position]
+            score = scores[position]
             ticker_data = self.stock_data[ticker]
-            ticker_metrics = metrics[ticker]
+            ticker_metrics = table.iloc[position].to_dict()
             
             # Use adjusted close if available
             price_col = 'Adj Close' if 'Adj Close' in ticker_data.columns else 'Close'
@@ -383,7 +689,8 @@ class StockRecommender:
                 'ticker': ticker,
                 'score': score,
                 'last_price': ticker_data[price_col].iloc[-1],
-                'predicted_return': ticker_metrics['predicted_10d_return'] * 100,  # Convert to percentage
+                'predicted_return': ticker_metrics[predicted_return_key(self.horizon)] * 100,  # Convert to percentage
+                'horizon': self.horizon,
                 'recent_performance': ticker_metrics['return_last_month'] * 100,  # Convert to percentage
                 'risk_level': self._assess_risk_level(ticker_metrics),
                 'reason': self._generate_reason(ticker, ticker_metrics)
@@ -393,6 +700,62 @@ class StockRecommender:
         self.recommendations = recommendations
         return recommendations
     
+    @staticmethod
+    def metrics_table(metrics):
+        """Columnar table of per-ticker metrics dicts, indexed by ticker"""
+        return pd.DataFrame.from_records(list(metrics.values()), index=list(metrics))
+    
+    @staticmethod
+    def score_table(table, horizon=10):
+        """Recommendation score of every row of a metrics table at once, as an array"""
+        def column(name):
+            return table[name].to_numpy(dtype=np.float64)
+        
+        def sign(condition):
+            return np.where(condition, 1.0, -1.0)
+        
+        predicted_return = column(predicted_return_key(horizon))
+        rsi = column('current_rsi')
+        bb_position = column('bb_position') if 'bb_position' in table.columns else np.full(len(table), 0.5)
+        
+        score = (
+            predicted_return * 5 +  # Much higher weight for predicted return
+            column('sharpe_ratio') * 0.5 +  # Reduced weight for Sharpe ratio
+            column('return_last_week') * 0.5 +  # Reduced weight for recent performance
+            sign(column('sma_20_ratio') > 1) * 0.5 +
+            sign(column('sma_50_ratio') > 1) * 0.5 +
+            # Strong penalty for overbought, bonus for oversold
+            np.where(rsi > 70, -2.0, np.where(rsi < 30, 1.0, 0.0)) +
+            sign(column('macd_signal') > 0) * 0.5 +
+            sign((0.2 < bb_position) & (bb_position < 0.8)) * 0.3 +
+            sign(column('annual_return') > 0) * 0.5  # Favor positive annual returns
+        )
+        score -= np.where(predicted_return < 0, 3.0, 0.0)  # Strong penalty for negative predicted returns
+        score -= np.where(rsi > 75, 2.0, 0.0)  # Additional penalty for severely overbought
+        return score
+    
+    @staticmethod
+    def filter_table(table, horizon=10):
+        """Whether each row of a metrics table is a buy candidate at all, regardless of score, as a boolean array"""
+        return ((table[predicted_return_key(horizon)].to_numpy(dtype=np.float64) > 0) &  # Only positive predictions
+                (table['current_rsi'].to_numpy(dtype=np.float64) < 75) &  # Not severely overbought
+                (table['sharpe_ratio'].to_numpy(dtype=np.float64) > 0))  # Positive risk-adjusted return
+    
+    @staticmethod
+    def top_n_indices(scores, top_n):
+        """Positions of the top_n highest scores, best first, ties in input order, via a partial sort"""
+        top_n = min(top_n, len(scores))
+        if top_n <= 0:
+            return np.array([], dtype=np.int64)
+        if top_n < len(scores):
+            # The top_n-th largest score; everything above it plus enough ties at it form the winners
+            threshold = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+            shortlist = np.flatnonzero(scores >= threshold)
+        else:
+            shortlist = np.arange(len(scores))
+        order = np.lexsort((shortlist, -scores[shortlist]))
+        return shortlist[order][:top_n]
+    
     def _assess_risk_level(self, metrics):
         """Assess risk level based on metrics"""
         risk_score = 0
@@ -408,7 +771,7 @@ class StockRecommender:
             risk_score += 20
         
         # Negative returns increase risk
-        if metrics['predicted_10d_return'] < 0:
+        if metrics[predicted_return_key(self.horizon)] < 0:
             risk_score += 30
             
         # Normalize to 1-5 scale
@@ -428,10 +791,11 @@ class StockRecommender:
         reasons = []
         
         # Positive factors
-        if metrics['predicted_10d_return'] > 0.03:
-            reasons.append(f"Strong predicted upside ({metrics['predicted_10d_return'] * 100:.2f}% in 10 days)")
-        elif metrics['predicted_10d_return'] > 0.01:
-            reasons.append(f"Positive predicted return ({metrics['predicted_10d_return'] * 100:.2f}% in 10 days)")
+        predicted_return = metrics[predicted_return_key(self.horizon)]
+        if predicted_return > 0.03:
+            reasons.append(f"Strong predicted upside ({predicted_return * 100:.2f}% in {self.horizon} days)")
+        elif predicted_return > 0.01:
+            reasons.append(f"Positive predicted return ({predicted_return * 100:.2f}% in {self.horizon} days)")
         
         if metrics['sharpe_ratio'] > 1.5:
             reasons.append("Excellent risk-adjusted returns")
@@ -468,6 +832,36 @@ class StockRecommender:
         
         return "; ".join(reasons[:4])  # Limit to top 4 factors
     
+    def walk_forward_backtest_all(self, **kwargs):
+        """
+        Walk-forward backtest every stock, skipping those with too little history
+        
+        Keyword arguments are passed to StockAnalyzer.walk_forward_backtest;
+        n_workers defaults to the recommender's worker count.
+        """
+        kwargs.setdefault('n_workers', self.n_workers)
+        results = {}
+        for ticker, analyzer in self.stock_analyzers.items():
+            try:
+                results[ticker] = analyzer.walk_forward_backtest(**kwargs)
+            except ValueError as e:
+                print(f"\nSkipping walk-forward backtest for {ticker}: {e}")
+        return results
+    
+    def memory_report(self):
+        """Memory footprint of every ticker's frame; attrs['universe_bytes'] holds the total"""
+        return memory_report(self.stock_data)
+    
+    def lookback_table(self, lookbacks=LOOKBACKS):
+        """
+        Multi-lookback returns, volatility, Sharpe and drawdown for every ticker, one row per ticker
+        
+        Uses each ticker's cleaned price history where one was added, so windows
+        end at the latest close rather than 30 bars earlier.
+        """
+        frames = {ticker: self.price_history.get(ticker, data) for ticker, data in self.stock_data.items()}
+        return lookback_table(frames, lookbacks=lookbacks)
+    
     def display_recommendations(self):
         """Display stock recommendations in a readable format"""
         if not self.recommendations:
@@ -478,7 +872,7 @@ class StockRecommender:
         for i, rec in enumerate(self.recommendations, 1):
             print(f"\n{i}. {rec['ticker']}")
             print(f"   Current Price: ${rec['last_price']:.2f}")
-            print(f"   Predicted 10-Day Return: {rec['predicted_return']:.2f}%")
+            print(f"   Predicted {rec['horizon']}-Day Return: {rec['predicted_return']:.2f}%")
             print(f"   Last Month Performance: {rec['recent_performance']:.2f}%")
             print(f"   Risk Level: {rec['risk_level']}")
             print(f"   Recommendation Score: {rec['score']:.2f}")
@@ -490,27 +884,37 @@ class StockRecommender:
         print("Recommendations are based on technical analysis only and do not consider fundamental factors.")
 
     def analyze_all_stocks(self):
-        """Analyze all stocks and compile metrics"""
+        """
+        Analyze all stocks and compile metrics, in worker processes when n_workers > 1
+        
+        With pooled_model, one PanelModel trained on every ticker replaces the
+        per-ticker forests.
+        """
         all_metrics = {}
         accuracy_results = {}
         
-        for ticker, analyzer in self.stock_analyzers.items():
-            metrics = analyzer.calculate_performance_metrics(ticker)
-            all_metrics[ticker] = metrics
-            
-            # Build and backtest prediction model
-            analyzer.build_prediction_model(forecast_period=10)
-            backtest_results = analyzer.backtest_model()
-            
-            # Store accuracy metrics
-            accuracy_results[ticker] = {
-                'directional_accuracy': backtest_results['directional_accuracy'],
-                'correlation': backtest_results['correlation'],
-                'mae': backtest_results['mae']
-            }
-            
-            predicted_return = analyzer.predict_future_return()
-            all_metrics[ticker]['predicted_10d_return'] = predicted_return
+        if self.pooled_model:
+            for ticker, analyzer in self.stock_analyzers.items():
+                try:
+                    all_metrics[ticker] = analyzer.calculate_performance_metrics(ticker)
+                except Exception as e:
+                    print(f"\nError analyzing {ticker}: {e}")
+            frames = {ticker: self.stock_data[ticker] for ticker in all_metrics}
+            if frames:
+                self.panel_model, outputs = _pooled_model_stage(frames, forecast_period=self.horizon)
+                for ticker, output in outputs.items():
+                    all_metrics[ticker][predicted_return_key(self.horizon)] = output['predicted_return']
+                    accuracy_results[ticker] = output['accuracy']
+        else:
+            items = [(ticker, analyzer, self.horizon, self.horizons) for ticker, analyzer in self.stock_analyzers.items()]
+            for ticker, metrics, accuracy, model_state in parallel_map(_analyze_stock, items, self.n_workers):
+                if metrics is None:
+                    continue
+                all_metrics[ticker] = metrics
+                accuracy_results[ticker] = accuracy
+                
+                # Keep the fitted model on the parent-side analyzer
+                vars(self.stock_analyzers[ticker]).update(model_state)
         
         # Print accuracy summary
         print("\n===== MODEL ACCURACY SUMMARY =====")
@@ -522,13 +926,492 @@ class StockRecommender:
         
         return all_metrics
 
-def main():
+def _accuracy_summary(backtest_results):
+    return {
+        'directional_accuracy': backtest_results['directional_accuracy'],
+        'correlation': backtest_results['correlation'],
+        'mae': backtest_results['mae']
+    }
+
+def _analyze_stock(item):
+    """
+    Metrics, model fit and backtest for one ticker; runs in worker processes
+    
+    With horizons, one multi-horizon model predicts every horizon and the
+    accuracy reported is that of the scoring horizon.
+    """
+    ticker, analyzer, horizon, horizons = item
+    try:
+        metrics = analyzer.calculate_performance_metrics(ticker)
+        
+        # Build and backtest prediction model
+        if horizons:
+            analyzer.build_multi_horizon_model(horizons)
+            accuracy = _accuracy_summary(analyzer.backtest_multi_horizon_model()[horizon])
+            for h, predicted_return in analyzer.predict_future_returns().items():
+                metrics[predicted_return_key(h)] = predicted_return
+            state_names = ('horizon_model', 'scaler', 'feature_list', 'horizons')
+        else:
+            analyzer.build_prediction_model(forecast_period=horizon)
+            accuracy = _accuracy_summary(analyzer.backtest_model(horizon))
+            metrics[predicted_return_key(horizon)] = analyzer.predict_future_return()
+            state_names = ('model', 'scaler', 'feature_list', 'forecast_period')
+        model_state = {name: getattr(analyzer, name) for name in state_names}
+        return ticker, metrics, accuracy, model_state
+    except Exception as e:
+        print(f"\nError analyzing {ticker}: {e}")
+        return ticker, None, None, None
+
+def _pooled_model_stage(frames, forecast_period=10):
+    """Fit one PanelModel on every ticker; returns it with per-ticker model outputs like _model_stage's"""
+    features = [f for f in PREDICTION_FEATURES if all(f in data.columns for data in frames.values())]
+    if not features:
+        raise ValueError("No valid features available for model training")
+    panel_model = PanelModel(features, forecast_period=forecast_period).fit(frames)
+    predictions = panel_model.predict_latest(frames)
+    accuracy = panel_model.backtest(frames)
+    print(f"\nFitted pooled model on {panel_model.n_rows} rows from {panel_model.n_tickers} tickers")
+    return panel_model, {ticker: {'predicted_return': predictions[ticker], 'accuracy': accuracy[ticker]}
+                         for ticker in frames}
+
+# Stages of a recommendation run, in execution order
+PIPELINE_STAGES = ['discover', 'load', 'clean', 'prices', 'indicators', 'metrics', 'model', 'score']
+
+# Per-ticker stages and the stages whose output they consume
+STAGE_INPUTS = {
+    'load': [],
+    'clean': ['load'],
+    'prices': ['clean'],
+    'indicators': ['clean'],
+    'metrics': ['indicators'],
+    'model': ['indicators']
+}
+
+# Per-ticker stages whose outputs are worth persisting between processes
+PERSISTED_STAGES = ('prices', 'indicators', 'metrics', 'model')
+
+# Columns of the cleaned frame kept by the prices stage for lookback metrics
+PRICE_COLUMNS = ['Date', 'Close', 'Adj Close']
+
+REQUIRED_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+def _model_stage(item):
+    """
+    Fit (or load), backtest and predict for one ticker; runs in worker processes
+    
+    With incremental models, a previous state whose rows are a prefix of the
+    new data is updated with only the appended rows instead of refitted. With
+    horizons, one multi-horizon model predicts all of them in a single call.
+    """
+    ticker, data, model_registry, forecast_period, incremental, previous, horizons = item
+    try:
+        analyzer = StockAnalyzer(data, ticker=ticker, model_registry=model_registry)
+        state = None
+        if incremental:
+            rows = previous['rows'] if previous else 0
+            extends = (previous is not None and 'Date' in data.columns and len(data) >= rows
+                       and data['Date'].iloc[rows - 1] == previous['last_date'])
+            if extends:
+                analyzer.data = data.iloc[:rows]
+                analyzer.incremental_model = previous['model']
+                analyzer._use_incremental_model(forecast_period, previous['features'])
+                action = analyzer.update_prediction_model(data.iloc[rows:])
+            else:
+                analyzer.build_incremental_model(forecast_period=forecast_period)
+                action = 'fit'
+            state = {'model': analyzer.incremental_model, 'features': analyzer.feature_list, 'rows': len(data),
+                     'last_date': data['Date'].iloc[-1] if 'Date' in data.columns else None, 'action': action}
+        elif horizons:
+            analyzer.build_multi_horizon_model(horizons)
+            predicted = analyzer.predict_future_returns()
+            accuracy = {h: _accuracy_summary(results) for h, results in analyzer.backtest_multi_horizon_model().items()}
+            return ticker, {'predicted_return': predicted[forecast_period], 'accuracy': accuracy[forecast_period],
+                            'predicted_returns': predicted, 'accuracy_by_horizon': accuracy}
+        else:
+            analyzer.build_prediction_model(forecast_period=forecast_period)
+        accuracy = _accuracy_summary(analyzer.backtest_model(forecast_period))
+        result = {'predicted_return': analyzer.predict_future_return(), 'accuracy': accuracy}
+        if state is not None:
+            result['incremental'] = state
+        return ticker, result
+    except Exception as e:
+        print(f"\nError modelling {ticker}: {e}")
+        return ticker, None
+
+class AnalysisPipeline:
+    """
+    Staged recommendation run: discover -> load -> clean -> indicators -> metrics -> model -> score
+    
+    Every per-ticker artifact is memoized under a fingerprint chained from the
+    source file's mtime/size and the stage parameters, so each artifact is
+    computed at most once and re-running after one file changes recomputes only
+    that ticker's downstream stages. With cache_dir, price histories,
+    indicator frames, metrics and model outputs are also persisted so a new
+    process can reuse them.
+    With snapshot_path, the discovered datasets and those artifacts are kept in
+    a single startup snapshot that a fresh process loads in one read. With
+    incremental_models, a ticker whose file only gained rows has its model
+    updated with those rows rather than refitted. With pooled_model, one
+    PanelModel trained on every ticker replaces the per-ticker models, and
+    model outputs are fingerprinted against the whole universe.
+    """
+    
+    def __init__(self, data_dir='data', use_adj_close=True, forecast_period=10, n_workers=1,
+                 panel_indicators=False, model_registry=None, cache_dir=None, keep_intermediates=False,
+                 compact=False, snapshot_path=None, incremental_models=False, pooled_model=False, horizons=None):
+        if sum(map(bool, (incremental_models, pooled_model, horizons))) > 1:
+            raise ValueError("incremental_models, pooled_model and horizons cannot be combined")
+        if horizons and forecast_period not in horizons:
+            raise ValueError(f"forecast_period {forecast_period} is not one of the horizons {tuple(horizons)}")
+        self.data_dir = data_dir
+        self.use_adj_close = use_adj_close
+        self.forecast_period = forecast_period
+        self.n_workers = n_workers
+        self.panel_indicators = panel_indicators
+        self.model_registry = model_registry
+        self.cache_dir = cache_dir
+        self.keep_intermediates = keep_intermediates
+        self.compact = compact
+        self.snapshot_path = snapshot_path
+        self.incremental_models = incremental_models
+        self.pooled_model = pooled_model
+        self.horizons = tuple(horizons) if horizons else None
+        self.panel_model = None
+        self.stock_files = {}
+        self.fingerprints = {}
+        self.stats = {}
+        self._memo = {}
+        self._columns = {}
+        self._snapshot_loaded = False
+    
+    def _stage_params(self, stage):
+        if stage == 'indicators':
+            return (self.use_adj_close, self.compact)
+        if stage == 'model':
+            return (self.forecast_period, self.incremental_models, self.pooled_model, self.horizons)
+        return ()
+    
+    @staticmethod
+    def _source_signature(file_path):
+        stat = os.stat(dataset_source(file_path))
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _fingerprint_ticker(self, file_path):
+        """Chain fingerprints from the source file through every per-ticker stage"""
+        mtime_ns, size = self._source_signature(file_path)
+        fingerprints = {}
+        for stage, inputs in STAGE_INPUTS.items():
+            upstream = [fingerprints[dep] for dep in inputs] or [f"{file_path}:{mtime_ns}:{size}"]
+            key = repr((stage, self._stage_params(stage), upstream))
+            fingerprints[stage] = hashlib.sha1(key.encode()).hexdigest()
+        return fingerprints
+    
+    def _cache_path(self, stage, ticker):
+        return os.path.join(self.cache_dir, ticker, f"{stage}.pkl")
+    
+    def _lookup(self, stage, ticker):
+        """Return (hit, value) for a memoized artifact, checking memory then the on-disk cache"""
+        fingerprint = self.fingerprints[ticker][stage]
+        entry = self._memo.get((stage, ticker))
+        if entry is not None and entry[0] == fingerprint:
+            return True, entry[1]
+        
+        if self.cache_dir and stage in PERSISTED_STAGES:
+            start = time.perf_counter()
+            try:
+                with open(self._cache_path(stage, ticker), 'rb') as f:
+                    cached_fingerprint, value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                cached_fingerprint, value = None, None
+            self.stats[stage]['seconds'] += time.perf_counter() - start
+            if cached_fingerprint == fingerprint:
+                self._memo[(stage, ticker)] = (fingerprint, value)
+                return True, value
+        return False, None
+    
+    def _previous(self, stage, ticker):
+        """The last artifact computed for a ticker and stage, even if its fingerprint is stale"""
+        entry = self._memo.get((stage, ticker))
+        if entry is not None:
+            return entry[1]
+        if self.cache_dir and stage in PERSISTED_STAGES:
+            try:
+                with open(self._cache_path(stage, ticker), 'rb') as f:
+                    return pickle.load(f)[1]
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                pass
+        return None
+    
+    def _store(self, stage, ticker, value):
+        fingerprint = self.fingerprints[ticker][stage]
+        self._memo[(stage, ticker)] = (fingerprint, value)
+        if self.cache_dir and stage in PERSISTED_STAGES:
+            path = self._cache_path(stage, ticker)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump((fingerprint, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+    
+    def _needed_stages(self, ticker):
+        """Stages that must run for a ticker; stages served from the memo are counted as reused"""
+        needed = set()
+        
+        def need(stage):
+            if stage in needed:
+                return
+            hit, _ = self._lookup(stage, ticker)
+            if hit:
+                self.stats[stage]['reused'] += 1
+                return
+            needed.add(stage)
+            for dep in STAGE_INPUTS[stage]:
+                need(dep)
+        
+        for stage in ('prices', 'indicators', 'metrics', 'model'):
+            need(stage)
+        return needed
+    
+    def _record(self, stage, ticker, value):
+        self._store(stage, ticker, value)
+        self.stats[stage]['computed'] += 1
+        self.stats[stage]['rows'] += len(value) if isinstance(value, pd.DataFrame) else 1
+    
+    def _dataset_columns(self, file_path):
+        """Column names of a dataset, remembered per file signature so unchanged files are not re-read"""
+        signature = self._source_signature(file_path)
+        cached = self._columns.get(file_path)
+        if cached is None or cached[0] != signature:
+            cached = self._columns[file_path] = (signature, available_columns(file_path))
+        return cached[1]
+    
+    def load_startup_snapshot(self):
+        """Seed discovery and the memo from snapshot_path; returns True if a snapshot was loaded"""
+        self._snapshot_loaded = True
+        payload = load_snapshot(self.snapshot_path, 'pipeline') if self.snapshot_path else None
+        if payload is None or payload['params'] != self._snapshot_params():
+            return False
+        self._columns.update(payload['columns'])
+        for key, entry in payload['memo'].items():
+            self._memo.setdefault(key, entry)
+        return True
+    
+    def save_startup_snapshot(self):
+        """Write discovered datasets and persisted-stage artifacts to snapshot_path"""
+        save_snapshot(self.snapshot_path, 'pipeline', {
+            'params': self._snapshot_params(),
+            'columns': dict(self._columns),
+            'memo': {key: entry for key, entry in self._memo.items() if key[0] in PERSISTED_STAGES}
+        })
+    
+    def _snapshot_params(self):
+        return (self.data_dir, self.use_adj_close, self.forecast_period, self.compact)
+    
+    def discover(self):
+        """Find datasets with the required columns, reading only their headers"""
+        if not os.path.exists(self.data_dir):
+            raise FileNotFoundError(f"Data directory '{self.data_dir}' not found.")
+        
+        self.stock_files = {}
+        for name in list_datasets(self.data_dir):
+            file = f"{name}.csv"
+            try:
+                ticker = os.path.splitext(file)[0].upper()
+                full_path = os.path.join(self.data_dir, file)
+                columns = self._dataset_columns(full_path)
+                missing_cols = [col for col in REQUIRED_COLUMNS if col not in columns]
+                if missing_cols:
+                    print(f"\nWarning: {file} is missing columns: {missing_cols}")
+                    continue
+                self.stock_files[ticker] = full_path
+                print(f"Found valid stock data: {ticker} at {full_path}")
+            except Exception as e:
+                print(f"\nError reading {file}: {str(e)}")
+        
+        self.fingerprints = {ticker: self._fingerprint_ticker(path) for ticker, path in self.stock_files.items()}
+        if self.pooled_model:
+            # A pooled model's outputs depend on every ticker's data, not just the ticker's own
+            universe = repr(sorted((ticker, prints['indicators']) for ticker, prints in self.fingerprints.items()))
+            for prints in self.fingerprints.values():
+                prints['model'] = hashlib.sha1(f"{prints['model']}:{universe}".encode()).hexdigest()
+        # Forget artifacts of tickers whose files are gone
+        self._memo = {key: value for key, value in self._memo.items() if key[1] in self.stock_files}
+        return self.stock_files
+    
+    def run(self, top_n=5):
+        """Run every stage, reusing memoized artifacts, and return the populated StockRecommender"""
+        self.stats = {stage: {'seconds': 0.0, 'rows': 0, 'computed': 0, 'reused': 0} for stage in PIPELINE_STAGES}
+        
+        start = time.perf_counter()
+        if self.snapshot_path and not self._snapshot_loaded:
+            self.load_startup_snapshot()
+        self.discover()
+        self.stats['discover'].update(seconds=time.perf_counter() - start, rows=len(self.stock_files),
+                                      computed=len(self.stock_files))
+        
+        needed = {ticker: self._needed_stages(ticker) for ticker in self.stock_files}
+        failed = set()
+        
+        def pending(stage):
+            return [t for t in self.stock_files if stage in needed[t] and t not in failed]
+        
+        def value(stage, ticker):
+            return self._lookup(stage, ticker)[1]
+        
+        stage_start = time.perf_counter()
+        for ticker in pending('load'):
+            data = StockDataProcessor(self.stock_files[ticker]).load_data()
+            if data is None:
+                failed.add(ticker)
+                continue
+            self._record('load', ticker, data)
+        self.stats['load']['seconds'] += time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        for ticker in pending('clean'):
+            processor = StockDataProcessor()
+            processor.data = value('load', ticker)
+            try:
+                self._record('clean', ticker, processor.clean_data())
+            except Exception as e:
+                print(f"\nError cleaning {ticker}: {e}")
+                failed.add(ticker)
+        self.stats['clean']['seconds'] += time.perf_counter() - stage_start
+        
+        # Price history up to the latest close, before indicators drop the last 30 bars
+        stage_start = time.perf_counter()
+        for ticker in pending('prices'):
+            data = value('clean', ticker)
+            self._record('prices', ticker, data[[col for col in PRICE_COLUMNS if col in data.columns]].copy())
+        self.stats['prices']['seconds'] += time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        todo = pending('indicators')
+        if self.panel_indicators and todo:
+            frames = {ticker: value('clean', ticker) for ticker in todo}
+            for ticker, data in StockDataProcessor.add_technical_indicators_panel(
+                    frames, use_adj_close=self.use_adj_close, compact=self.compact).items():
+                self._record('indicators', ticker, data)
+        else:
+            for ticker in todo:
+                processor = StockDataProcessor()
+                processor.data = value('clean', ticker).copy()
+                try:
+                    self._record('indicators', ticker, processor.add_technical_indicators(
+                        use_adj_close=self.use_adj_close, compact=self.compact))
+                except Exception as e:
+                    print(f"\nError adding indicators for {ticker}: {e}")
+                    failed.add(ticker)
+        if not self.keep_intermediates:
+            for ticker in todo:
+                self._memo.pop(('load', ticker), None)
+                self._memo.pop(('clean', ticker), None)
+        self.stats['indicators']['seconds'] += time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        for ticker in pending('metrics'):
+            try:
+                analyzer = StockAnalyzer(value('indicators', ticker))
+                self._record('metrics', ticker, analyzer.calculate_performance_metrics(ticker, verbose=False))
+            except Exception as e:
+                print(f"\nError calculating metrics for {ticker}: {e}")
+                failed.add(ticker)
+        self.stats['metrics']['seconds'] += time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        if self.pooled_model and pending('model'):
+            frames = {ticker: value('indicators', ticker) for ticker in self.stock_files if ticker not in failed}
+            try:
+                self.panel_model, outputs = _pooled_model_stage(frames, self.forecast_period)
+                for ticker, output in outputs.items():
+                    self._record('model', ticker, output)
+            except Exception as e:
+                print(f"\nError fitting pooled model: {e}")
+                failed.update(pending('model'))
+        items = []
+        for ticker in ([] if self.pooled_model else pending('model')):
+            previous = None
+            if self.incremental_models:
+                previous = (self._previous('model', ticker) or {}).get('incremental')
+            items.append((ticker, value('indicators', ticker), self.model_registry, self.forecast_period,
+                          self.incremental_models, previous, self.horizons))
+        for ticker, result in parallel_map(_model_stage, items, self.n_workers):
+            if result is None:
+                failed.add(ticker)
+                continue
+            self._record('model', ticker, result)
+        self.stats['model']['seconds'] += time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        recommender = StockRecommender(n_workers=self.n_workers, model_registry=self.model_registry,
+                                       pooled_model=self.pooled_model, horizon=self.forecast_period,
+                                       horizons=self.horizons)
+        all_metrics = {}
+        for ticker in self.stock_files:
+            if ticker in failed:
+                continue
+            recommender.add_stock_data(ticker, value('indicators', ticker), prices=value('prices', ticker))
+            model_output = value('model', ticker)
+            predicted = model_output.get('predicted_returns', {self.forecast_period: model_output['predicted_return']})
+            all_metrics[ticker] = dict(value('metrics', ticker),
+                                       **{predicted_return_key(h): r for h, r in predicted.items()})
+        
+        if all_metrics:
+            recommender.rank_recommendations(all_metrics, top_n=min(top_n, len(all_metrics)))
+        self.stats['score'].update(seconds=time.perf_counter() - stage_start,
+                                   rows=len(recommender.recommendations), computed=1)
+        
+        if self.snapshot_path and any(stat['computed'] for stage, stat in self.stats.items() if stage in PERSISTED_STAGES):
+            self.save_startup_snapshot()
+        return recommender
+    
+    def print_accuracy_summary(self):
+        """Print backtest accuracy for every modelled ticker"""
+        print("\n===== MODEL ACCURACY SUMMARY =====")
+        for ticker in self.stock_files:
+            entry = self._memo.get(('model', ticker))
+            if entry is None:
+                continue
+            acc = entry[1]['accuracy']
+            print(f"\n{ticker}:")
+            print(f"  Directional Accuracy: {acc['directional_accuracy']:.2f}%")
+            print(f"  Predictions-Actuals Correlation: {acc['correlation']:.4f}")
+            print(f"  Mean Absolute Error: {acc['mae']:.4f}")
+    
+    def print_report(self):
+        """Print wall time, row counts and memo reuse for every stage"""
+        print("\n===== PIPELINE STAGES =====")
+        print(f"{'Stage':<12}{'Seconds':>10}{'Rows':>10}{'Computed':>10}{'Reused':>10}")
+        for stage in PIPELINE_STAGES:
+            stat = self.stats.get(stage)
+            if stat is None:
+                continue
+            print(f"{stage:<12}{stat['seconds']:>10.3f}{stat['rows']:>10}{stat['computed']:>10}{stat['reused']:>10}")
+
+def print_memory_report(recommender):
+    """Print the per-ticker and universe memory footprint of the processed frames"""
+    report = recommender.memory_report()
+    print("\n===== MEMORY FOOTPRINT =====")
+    print(f"{'Ticker':<10}{'Rows':>8}{'Columns':>9}{'KB':>10}{'Bytes/Row':>11}")
+    for row in report.itertuples():
+        print(f"{row.ticker:<10}{row.rows:>8}{row.columns:>9}{row.bytes / 1024:>10.1f}{row.bytes_per_row:>11.1f}")
+    print(f"Universe: {len(report)} tickers, {report.attrs['universe_bytes'] / (1024 * 1024):.2f} MB")
+
+def print_lookback_table(recommender):
+    """Print every ticker's returns, volatility, Sharpe ratio and max drawdown over each lookback"""
+    table = recommender.lookback_table()
+    print("\n===== LOOKBACK METRICS =====")
+    for metric in ('return', 'volatility', 'sharpe', 'max_drawdown'):
+        columns = [col for col in table.columns if col.startswith(f'{metric}_')]
+        section = table[columns].rename(columns=lambda col: col[len(metric) + 1:])
+        print(f"\n{metric.replace('_', ' ').title()}:")
+        print(section.to_string(float_format=lambda value: f"{value:.4f}"))
+
+def main(n_workers=1, panel_indicators=False, model_cache_dir=None, cache_dir=None, compact=False,
+         snapshot_path=None, incremental_models=False, pooled_model=False, horizon=10, horizons=None,
+         lookbacks=False):
     print("Stock Recommendation System")
     print("---------------------------")
     
-    # Initialize the recommender
-    recommender = StockRecommender()
-    
     # Automatically detect all CSV files in the data directory
     data_dir = 'data'
     if not os.path.exists(data_dir):
@@ -539,79 +1422,68 @@ def main():
     print("\nFiles found in data directory:")
     for f in os.listdir(data_dir):
         print(f"- {f} ({'CSV' if f.endswith('.csv') else 'Not CSV'})")
+    print()
     
-    stock_files = {}
-    for file in os.listdir(data_dir):
-        if file.endswith('.csv'):
-            try:
-                ticker = os.path.splitext(file)[0].upper()
-                full_path = os.path.join(data_dir, file)
-                
-                # Debug: Verify file can be read
-                test_df = pd.read_csv(full_path)
-                required_cols = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
-                missing_cols = [col for col in required_cols if col not in test_df.columns]
-                
-                if missing_cols:
-                    print(f"\nWarning: {file} is missing columns: {missing_cols}")
-                    continue
-                
-                stock_files[ticker] = full_path
-                print(f"Found valid stock data: {ticker} at {full_path}")
-                
-            except Exception as e:
-                print(f"\nError reading {file}: {str(e)}")
-                continue
+    model_registry = ModelRegistry(model_cache_dir) if model_cache_dir else None
+    pipeline = AnalysisPipeline(data_dir, forecast_period=horizon, n_workers=n_workers, panel_indicators=panel_indicators,
+                                model_registry=model_registry, cache_dir=cache_dir, compact=compact,
+                                snapshot_path=snapshot_path, incremental_models=incremental_models,
+                                pooled_model=pooled_model, horizons=horizons)
+    recommender = pipeline.run(top_n=5)
     
-    if not stock_files:
+    if not pipeline.stock_files:
         print("\nNo valid CSV files found in the data directory.")
         print("Please ensure files have the correct format and required columns.")
         return
     
-    print(f"\nFound {len(stock_files)} valid stock files to process:")
-    for ticker in stock_files:
-        print(f"- {ticker}")
-    
-    # Process each stock file found
-    success_count = 0
-    for ticker, file_path in stock_files.items():
-        try:
-            print(f"\nProcessing {ticker}...")
-            processor = StockDataProcessor(file_path)
-            data = processor.load_data()
-            
-            if data is not None:
-                print(f"- Successfully loaded {len(data)} rows")
-                processor.clean_data()
-                processed_data = processor.add_technical_indicators(use_adj_close=True)
-                
-                if processed_data is not None:
-                    recommender.add_stock_data(ticker, processed_data)
-                    success_count += 1
-                    print(f"- Successfully processed {ticker}")
-                else:
-                    print(f"- Failed to process indicators for {ticker}")
-            else:
-                print(f"- Failed to load data for {ticker}")
-                
-        except Exception as e:
-            print(f"\nError processing {ticker}: {e}")
-            continue
-    
     # Generate recommendations
-    if success_count > 0:
-        print(f"\nSuccessfully processed {success_count} stocks:")
+    if recommender.stock_data:
+        print(f"\nSuccessfully processed {len(recommender.stock_data)} stocks:")
         for ticker in recommender.stock_data:
             print(f"- {ticker}")
         
-        print("\nGenerating stock recommendations...")
-        recommender.generate_recommendations(top_n=min(5, success_count))
+        pipeline.print_accuracy_summary()
         recommender.display_recommendations()
+        if compact:
+            print_memory_report(recommender)
+        if lookbacks:
+            print_lookback_table(recommender)
     else:
         print("\nNo stock data was successfully processed. Please check:")
         print("1. File permissions")
         print("2. CSV file formats")
-        print("3. Required columns in each file")       
+        print("3. Required columns in each file")
+    
+    pipeline.print_report()
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Stock Recommendation System")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for per-ticker analysis (0 = one per CPU)")
+    parser.add_argument('--panel', action='store_true',
+                        help="Compute technical indicators for all tickers at once in panel mode")
+    parser.add_argument('--model-cache', nargs='?', const=str(DEFAULT_REGISTRY_DIR), default=None,
+                        help="Reuse trained models from an on-disk registry (default dir: %(const)s)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Persist per-ticker pipeline artifacts here so unchanged tickers are reused across runs")
+    parser.add_argument('--compact', action='store_true',
+                        help="Keep processed frames in the compact float32 layout and report their memory footprint")
+    parser.add_argument('--snapshot', default=None,
+                        help="Startup snapshot file: discovered datasets and processed artifacts are loaded from it "
+                             "and rewritten when anything was recomputed")
+    parser.add_argument('--incremental-models', action='store_true',
+                        help="Update models with newly appended rows instead of refitting (use with --cache-dir or --snapshot)")
+    parser.add_argument('--pooled-model', action='store_true',
+                        help="Train one model on the stacked panel of all tickers instead of one model per ticker")
+    parser.add_argument('--horizon', type=int, default=10,
+                        help="Forecast period in days that recommendations are scored on")
+    parser.add_argument('--horizons', type=int, nargs='+', default=None,
+                        help=f"Fit one multi-horizon model per ticker for these forecast periods "
+                             f"(available: {' '.join(map(str, FORECAST_HORIZONS))})")
+    parser.add_argument('--lookbacks', action='store_true',
+                        help="Print 1W/1M/3M/6M/1Y/YTD returns, volatility, Sharpe and drawdown for every ticker")
+    args = parser.parse_args()
+    main(n_workers=args.workers, panel_indicators=args.panel, model_cache_dir=args.model_cache,
+         cache_dir=args.cache_dir, compact=args.compact, snapshot_path=args.snapshot,
+         incremental_models=args.incremental_models, pooled_model=args.pooled_model,
+         horizon=args.horizon, horizons=args.horizons, lookbacks=args.lookbacks)
\ No newline at end of file
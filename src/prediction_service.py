@@ -0,0 +1,170 @@
+"""
+Warm prediction models for serving
+
+PredictionService keeps each ticker's packed model and scaler, latest feature
+row and performance metrics in memory, keyed by the dataset's mtime/size so an
+entry is rebuilt only when its file changes. A request for many tickers is
+answered with one batched PackedForests traversal per model family (estimator
+type and feature list) instead of one model.predict call per ticker.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import dataset_source, load_frame
+from forest_batch import PackedForests
+from model_registry import ModelRegistry
+from prediction import StockAnalyzer, StockDataProcessor, StockRecommender
+from startup_snapshot import load_snapshot, save_snapshot
+
+FORECAST_PERIOD = 10
+
+
+class PredictionService:
+    """Batched 10-day return predictions and recommendation scores from warm per-ticker models"""
+
+    def __init__(self, data_dir: Union[str, Path], use_adj_close: bool = True,
+                 model_registry: Optional[ModelRegistry] = None,
+                 loader: Optional[Callable[[str], pd.DataFrame]] = None):
+        self.data_dir = Path(data_dir)
+        self.use_adj_close = use_adj_close
+        self.model_registry = model_registry
+        self.loader = loader or (lambda ticker: load_frame(self.data_dir / f"{ticker}.csv"))
+        self._entries: Dict[str, Dict] = {}
+        self._packs: Dict[Tuple, Tuple[PackedForests, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, ticker: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(dataset_source(self.data_dir / f"{ticker}.csv"))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_entry(self, ticker: str, signature: Tuple[int, int]) -> Dict:
+        """Process one ticker and fit (or load) its model; failures are cached until the file changes"""
+        try:
+            processor = StockDataProcessor()
+            processor.data = self.loader(ticker).copy()
+            if 'Date' in processor.data.columns and not pd.api.types.is_datetime64_any_dtype(processor.data['Date']):
+                processor.data['Date'] = pd.to_datetime(processor.data['Date'])
+            processor.clean_data()
+            data = processor.add_technical_indicators(use_adj_close=self.use_adj_close, verbose=False)
+            if data.empty:
+                raise ValueError("No rows left after computing indicators")
+
+            analyzer = StockAnalyzer(data, ticker=ticker, model_registry=self.model_registry)
+            metrics = analyzer.calculate_performance_metrics(ticker, verbose=False)
+            analyzer.build_prediction_model(forecast_period=FORECAST_PERIOD, verbose=False)
+        except Exception as e:
+            return {'signature': signature, 'error': str(e)}
+
+        return {
+            'signature': signature,
+            # Packed node arrays rather than the sklearn objects: they predict in
+            # batches and unpickle from a startup snapshot without importing sklearn
+            'forest': PackedForests.from_forests([analyzer.model], [analyzer.scaler]),
+            'family': (type(analyzer.model).__name__, tuple(analyzer.feature_list)),
+            'latest': data[analyzer.feature_list].iloc[-1].to_numpy(dtype=np.float64),
+            'metrics': metrics,
+            'last_price': float(data[analyzer.price_col].iloc[-1]),
+            'as_of': data['Date'].iloc[-1].isoformat() if 'Date' in data.columns else None
+        }
+
+    def warm(self, tickers: List[str]) -> Dict[str, Dict]:
+        """Make sure every ticker has an up-to-date entry, returning the entries"""
+        entries = {}
+        for ticker in tickers:
+            signature = self._signature(ticker)
+            if signature is None:
+                entries[ticker] = {'signature': None, 'error': f"No dataset found for {ticker}"}
+                continue
+            with self._lock:
+                entry = self._entries.get(ticker)
+            if entry is None or entry['signature'] != signature:
+                entry = self._build_entry(ticker, signature)
+                with self._lock:
+                    previous = self._entries.get(ticker)
+                    self._entries[ticker] = entry
+                    # Repack any family that gained, lost or changed a model
+                    for family in {e.get('family') for e in (previous, entry) if e is not None}:
+                        self._packs.pop(family, None)
+            entries[ticker] = entry
+        return entries
+
+    def save_snapshot(self, path: Union[str, Path]) -> None:
+        """Write every warm entry (packed model, latest features, metrics) to a startup snapshot"""
+        with self._lock:
+            entries = {ticker: entry for ticker, entry in self._entries.items() if 'error' not in entry}
+        save_snapshot(path, 'prediction_service', {'use_adj_close': self.use_adj_close, 'entries': entries})
+
+    def load_snapshot(self, path: Union[str, Path]) -> int:
+        """
+        Load warm entries from a startup snapshot, returning how many were loaded
+
+        Entries carry their dataset signature, so any whose file has changed
+        since the snapshot was written are rebuilt on first use.
+        """
+        payload = load_snapshot(path, 'prediction_service')
+        if payload is None or payload['use_adj_close'] != self.use_adj_close:
+            return 0
+        with self._lock:
+            for ticker, entry in payload['entries'].items():
+                self._entries.setdefault(ticker, entry)
+            self._packs.clear()
+        return len(payload['entries'])
+
+    def _pack(self, family: Tuple) -> Tuple[PackedForests, Dict[str, int]]:
+        with self._lock:
+            pack = self._packs.get(family)
+            if pack is None:
+                members = sorted(t for t, e in self._entries.items() if e.get('family') == family)
+                forests = PackedForests.concat([self._entries[t]['forest'] for t in members])
+                pack = self._packs[family] = (forests, {t: i for i, t in enumerate(members)})
+            return pack
+
+    def predict(self, tickers: List[str]) -> Tuple[List[Dict], Dict[str, str]]:
+        """
+        Predict the 10-day return and recommendation score for each ticker
+
+        Returns (predictions in request order, {ticker: error} for tickers
+        that could not be predicted). Repeated tickers are predicted once.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        entries = self.warm(tickers)
+        errors = {ticker: entry['error'] for ticker, entry in entries.items() if 'error' in entry}
+
+        by_family: Dict[Tuple, List[str]] = {}
+        for ticker, entry in entries.items():
+            if 'error' not in entry:
+                by_family.setdefault(entry['family'], []).append(ticker)
+
+        predicted = {}
+        for family, members in by_family.items():
+            forests, index = self._pack(family)
+            X = np.stack([entries[ticker]['latest'] for ticker in members])
+            values = forests.predict(X, [index[ticker] for ticker in members])
+            predicted.update(zip(members, values))
+
+        ordered = [ticker for ticker in tickers if ticker in predicted]
+        table = StockRecommender.metrics_table({ticker: entries[ticker]['metrics'] for ticker in ordered})
+        table['predicted_10d_return'] = [predicted[ticker] for ticker in ordered]
+        scores = StockRecommender.score_table(table) if ordered else []
+        candidates = StockRecommender.filter_table(table) if ordered else []
+
+        results = []
+        for ticker, score, candidate in zip(ordered, scores, candidates):
+            entry = entries[ticker]
+            results.append({
+                'ticker': ticker,
+                'predicted_10d_return': float(predicted[ticker]),
+                'score': float(score),
+                'candidate': bool(candidate),
+                'last_price': entry['last_price'],
+                'as_of': entry['as_of']
+            })
+        return results, errors
@@ -1,33 +1,88 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
 from pathlib import Path
 
+from parallel import parallel_map
+from columnar_store import write_frame
+
 # Set the correct data directory
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
 
-def generate_stock_data(ticker, start_price, volatility, drift, volume_range, dates):
-    """Generate synthetic stock data for a single ticker"""
-    close_price = start_price
-    prices = []
-    
-    for _ in range(len(dates)):
-        change = np.random.normal(drift, volatility)
-        close_price *= (1 + change)
-        prices.append(close_price)
-    
+OUTPUT_FORMATS = ('csv', 'columnar', 'both')
+
+def generate_stock_data(ticker, start_price, volatility, drift, volume_range, dates, rng=None):
+    """
+    Generate synthetic stock data for a single ticker
+
+    The whole price path is one cumulative product of normal returns. rng is a
+    numpy Generator; when omitted the global np.random state is used, which
+    draws the same sequence as the original per-bar loop.
+    """
+    rng = np.random if rng is None else rng
+    n = len(dates)
+
+    prices = start_price * np.cumprod(1 + rng.normal(drift, volatility, n))
+
     return pd.DataFrame({
         'Date': dates,
-        'Open': [price * (1 - np.random.uniform(0, 0.01)) for price in prices],
-        'High': [price * (1 + np.random.uniform(0, 0.015)) for price in prices],
-        'Low': [price * (1 - np.random.uniform(0, 0.015)) for price in prices],
+        'Open': prices * (1 - rng.uniform(0, 0.01, n)),
+        'High': prices * (1 + rng.uniform(0, 0.015, n)),
+        'Low': prices * (1 - rng.uniform(0, 0.015, n)),
         'Close': prices,
-        'Adj Close': [price * (1 - np.random.uniform(0, 0.002)) for price in prices],
-        'Volume': [int(np.random.uniform(*volume_range)) for _ in range(len(dates))]
+        'Adj Close': prices * (1 - rng.uniform(0, 0.002, n)),
+        'Volume': rng.uniform(*volume_range, n).astype(np.int64)
     })
 
-def generate_sample_stock_data():
+def write_stock_data(data, ticker, data_dir, fmt='csv'):
+    """Write one ticker's data as CSV, as a standalone columnar dataset, or both"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}'. Use one of {OUTPUT_FORMATS}")
+    if fmt in ('csv', 'both'):
+        data.to_csv(Path(data_dir) / f"{ticker}.csv", index=False)
+    if fmt in ('columnar', 'both'):
+        write_frame(data_dir, ticker, data)
+
+def _generate_universe_ticker(task):
+    """Generate and write one synthetic ticker from its own seed; runs in worker processes"""
+    index, seed, dates, data_dir, fmt, prefix = task
+    rng = np.random.default_rng(seed)
+    ticker = f"{prefix}{index:05d}"
+    try:
+        data = generate_stock_data(
+            ticker=ticker,
+            start_price=rng.uniform(10, 1000),
+            volatility=rng.uniform(0.01, 0.03),
+            drift=rng.uniform(-0.0002, 0.001),
+            volume_range=(1000000, 100000000),
+            dates=dates,
+            rng=rng
+        )
+        write_stock_data(data, ticker, data_dir, fmt)
+        return ticker
+    except Exception as e:
+        print(f"Error generating {ticker}: {str(e)}")
+        return None
+
+def generate_universe(n_tickers, n_days, data_dir=DATA_DIR, fmt='csv', workers=1, seed=42,
+                      start='2000-01-03', prefix='SYN'):
+    """
+    Generate a synthetic universe of n_tickers x n_days business days for load testing
+
+    Every ticker gets an independent seed spawned from seed, so output is
+    reproducible regardless of worker count. Returns the tickers written.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    dates = pd.date_range(start=start, periods=n_days, freq='B')
+    seeds = np.random.SeedSequence(seed).spawn(n_tickers)
+
+    tasks = [(i, seeds[i], dates, str(data_dir), fmt, prefix) for i in range(n_tickers)]
+    return [ticker for ticker in parallel_map(_generate_universe_ticker, tasks, workers) if ticker]
+
+def generate_sample_stock_data(periods=200):
     """Generate sample stock data for multiple companies"""
     configs = [
         {'ticker': 'AAPL', 'start_price': 150, 'volatility': 0.015, 'drift': 0.0005, 'volume_range': (5000000, 100000000)},
@@ -37,13 +92,13 @@ def generate_sample_stock_data():
         {'ticker': 'NFLX', 'start_price': 350, 'volatility': 0.014, 'drift': 0.0007, 'volume_range': (8000000, 90000000)},
         {'ticker': 'AMZN', 'start_price': 750, 'volatility': 0.015, 'drift': 0.0006, 'volume_range': (9000000, 90000000)}
     ]
-    
+
     # Create data directory if it doesn't exist
     DATA_DIR.mkdir(exist_ok=True)
-    
-    dates = pd.date_range(start='2023-01-01', periods=200, freq='B')
+
+    dates = pd.date_range(start='2023-01-01', periods=periods, freq='B')
     np.random.seed(42)
-    
+
     for config in configs:
         try:
             data = generate_stock_data(
@@ -54,15 +109,30 @@ def generate_sample_stock_data():
                 volume_range=config['volume_range'],
                 dates=dates
             )
-            
+
             file_path = DATA_DIR / f"{config['ticker']}.csv"
             data.to_csv(file_path, index=False)
             print(f"Generated: {file_path}")
-            
+
         except Exception as e:
             print(f"Error generating {config['ticker']}: {str(e)}")
 
 if __name__ == "__main__":
-    print(f"Generating sample data in: {DATA_DIR}")
-    generate_sample_stock_data()
-    print("Data generation complete!")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate synthetic stock data")
+    parser.add_argument('--tickers', type=int, help="Generate a synthetic universe of this many tickers instead of the six samples")
+    parser.add_argument('--days', type=int, default=200, help="Business days per ticker (default: 200)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', help="Output format for --tickers (default: csv)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for --tickers (0 = one per CPU)")
+    parser.add_argument('--seed', type=int, default=42, help="Base seed for --tickers (default: 42)")
+    parser.add_argument('--out', default=str(DATA_DIR), help="Output directory for --tickers")
+    args = parser.parse_args()
+
+    if args.tickers:
+        print(f"Generating {args.tickers} tickers x {args.days} days in: {args.out}")
+        written = generate_universe(args.tickers, args.days, args.out, fmt=args.format,
+                                    workers=args.workers, seed=args.seed)
+        print(f"Generated {len(written)} tickers")
+    else:
+        print(f"Generating sample data in: {DATA_DIR}")
+        generate_sample_stock_data(periods=args.days)
+    print("Data generation complete!")
@@ -0,0 +1,44 @@
+"""
+Startup snapshots
+
+One pickle file holding what a fresh process would otherwise rebuild before
+doing useful work: the discovered datasets and their preprocessed per-ticker
+artifacts. Writers key every entry by the dataset's file signature, so a
+process that loads a snapshot reuses whatever is still current and rebuilds
+only the rest. Missing, corrupt or foreign snapshots load as None.
+"""
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Union
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: Union[str, Path], kind: str, payload: Any) -> None:
+    """Atomically write payload as a snapshot of the given kind"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        'version': SNAPSHOT_VERSION,
+        'kind': kind,
+        'created_at': datetime.now().isoformat(),
+        'payload': payload
+    }
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: Union[str, Path], kind: str) -> Optional[Any]:
+    """Return the payload of a snapshot of the given kind, or None if there is no usable one"""
+    try:
+        with open(path, 'rb') as f:
+            document = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return None
+    if not isinstance(document, dict) or document.get('version') != SNAPSHOT_VERSION or document.get('kind') != kind:
+        return None
+    return document['payload']
@@ -0,0 +1,78 @@
+"""
+Bounded-memory chunked ingestion of per-ticker price history
+
+CSV files are read in chunks sized from a memory budget, with explicit column
+dtypes and only the needed columns, and NaN rows are dropped per chunk.
+Indicators are then computed chunk by chunk through
+indicators.StreamingIndicators, so peak memory depends on the chunk size
+rather than the length of the history.
+"""
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+RAW_DTYPES = {
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Adj Close': 'float64',
+    # Nullable on read so NaN rows can be dropped before casting to int64
+    'Volume': 'Int64'
+}
+
+# Rough in-flight cost per row: raw columns, 17 float64 indicator columns and
+# temporaries created while computing them
+BYTES_PER_ROW = 1024
+MIN_CHUNKSIZE = 256
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+
+def chunksize_for_budget(memory_budget_mb: float) -> int:
+    """Rows per chunk that keep a chunk's processing within the memory budget"""
+    return max(MIN_CHUNKSIZE, int(memory_budget_mb * 1024 * 1024 // BYTES_PER_ROW))
+
+
+def _dtypes_for(columns: Optional[Iterable[str]]) -> Dict[str, str]:
+    if columns is None:
+        return dict(RAW_DTYPES)
+    return {col: dtype for col, dtype in RAW_DTYPES.items() if col in columns}
+
+
+def is_date_sorted(path: str, chunksize: int) -> bool:
+    """Check that Date is non-decreasing by streaming only the Date column"""
+    previous = None
+    for chunk in pd.read_csv(path, usecols=['Date'], chunksize=chunksize):
+        dates = pd.to_datetime(chunk['Date']).dropna()
+        if dates.empty:
+            continue
+        if not dates.is_monotonic_increasing:
+            return False
+        if previous is not None and dates.iloc[0] < previous:
+            return False
+        previous = dates.iloc[-1]
+    return True
+
+
+def iter_clean_chunks(path: str, chunksize: int, columns: Optional[Iterable[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield cleaned chunks of a CSV: typed columns, Date parsed, NaN rows dropped
+
+    columns restricts the columns read (usecols); by default every column is
+    read. The caller is responsible for checking the file is date-sorted.
+    """
+    wanted = set(columns) if columns is not None else None
+    reader = pd.read_csv(
+        path,
+        usecols=(lambda col: col in wanted) if wanted is not None else None,
+        dtype=_dtypes_for(wanted),
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        if 'Date' in chunk.columns:
+            chunk['Date'] = pd.to_datetime(chunk['Date'])
+        chunk = chunk.dropna()
+        if 'Volume' in chunk.columns:
+            chunk['Volume'] = chunk['Volume'].astype(np.int64)
+        yield chunk
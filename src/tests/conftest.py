@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# Modules in src/ and src/api import each other by flat name
+for path in (SRC_DIR, SRC_DIR / 'api'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
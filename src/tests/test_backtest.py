@@ -0,0 +1,28 @@
+import numpy as np
+
+import backtest
+import parallel
+
+
+def test_parallel_walk_forward_matches_sequential_and_ships_arrays_once(monkeypatch):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(260, 4))
+    y = X[:, 0] * 0.1 + rng.normal(0, 0.05, 260)
+    params = {'n_estimators': 10}
+    sequential = backtest.walk_forward_backtest(X, y, test_size=40, model_params=params)
+
+    monkeypatch.setattr(parallel.os, 'cpu_count', lambda: 2)
+    tasks = []
+
+    def recording_map(func, items, workers, **kwargs):
+        tasks.extend(items)
+        return parallel.parallel_map(func, tasks, workers, **kwargs)
+
+    monkeypatch.setattr(backtest, 'parallel_map', recording_map)
+    pooled = backtest.walk_forward_backtest(X, y, test_size=40, n_workers=2, model_params=params)
+
+    assert len(tasks) == 4
+    assert not any(isinstance(value, np.ndarray) for task in tasks for value in task)
+    assert backtest._shared_arrays == {}
+    for name, values in sequential.items():
+        np.testing.assert_array_equal(pooled[name], values)
@@ -0,0 +1,19 @@
+import json
+
+import benchmark
+import prediction_api
+
+
+def test_benchmark_runs_at_tiny_scale(tmp_path):
+    data_dir, manifest = prediction_api.DATA_DIR, prediction_api.manifest
+    output = tmp_path / 'results.json'
+    code = benchmark.main(['--scale', '3x120', '--model-sample', '1',
+                           '--work-dir', str(tmp_path / 'work'), '--output', str(output)])
+
+    assert code == 0
+    stages = {result['stage']: result for result in json.loads(output.read_text())['results']}
+    assert stages['generate_market_analysis (cold)']['items'] == 3
+    assert stages['generate_market_analysis (warm)']['items'] == 3
+    assert all(result['peak_mb'] is not None for result in stages.values())
+    # The API module keeps serving its own data directory
+    assert prediction_api.DATA_DIR is data_dir and prediction_api.manifest is manifest
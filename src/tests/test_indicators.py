@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from prediction import StockDataProcessor
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+TICKERS = ['AAPL', 'META', 'NFLX', 'MSFT']
+
+
+def _cleaned(ticker):
+    processor = StockDataProcessor(str(DATA_DIR / f'{ticker}.csv'))
+    processor.load_data()
+    return processor.clean_data()
+
+
+def _full(ticker):
+    processor = StockDataProcessor()
+    processor.data = _cleaned(ticker)
+    return processor.add_technical_indicators(verbose=False)
+
+
+def _panel(ticker):
+    frames = {t: _cleaned(t) for t in TICKERS}
+    return StockDataProcessor.add_technical_indicators_panel(frames)[ticker]
+
+
+def _incremental(ticker):
+    cleaned = _cleaned(ticker)
+    split = len(cleaned) * 2 // 3
+    processor = StockDataProcessor()
+    processor.data = cleaned.iloc[:split].copy()
+    processor.add_technical_indicators(incremental=True, verbose=False)
+    for start in range(split, len(cleaned), 7):
+        processor.update_technical_indicators(cleaned.iloc[start:start + 7])
+    return processor.data
+
+
+def _streaming(ticker):
+    processor = StockDataProcessor(str(DATA_DIR / f'{ticker}.csv'))
+    return processor.load_streaming(memory_budget_mb=0)
+
+
+# Running sums and EWM seeds reorder the arithmetic, so values agree to rounding
+@pytest.mark.parametrize('engine', [_panel, _incremental, _streaming])
+@pytest.mark.parametrize('ticker', TICKERS)
+def test_indicator_engines_match_a_full_recompute(ticker, engine):
+    expected = _full(ticker)
+
+    result = engine(ticker)
+
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-9)
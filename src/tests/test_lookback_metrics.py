@@ -0,0 +1,24 @@
+import contextlib
+import io
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from prediction import AnalysisPipeline
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+
+def test_lookback_windows_end_on_the_last_close(tmp_path):
+    shutil.copy(DATA_DIR / 'AAPL.csv', tmp_path / 'AAPL.csv')
+    closes = pd.read_csv(tmp_path / 'AAPL.csv')['Adj Close']
+    pipeline = AnalysisPipeline(str(tmp_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender = pipeline.run(top_n=1)
+
+    table = recommender.lookback_table()
+
+    assert table.loc['AAPL', 'return_1W'] == pytest.approx(closes.iloc[-1] / closes.iloc[-6] - 1)
+    assert recommender.stock_analyzers['AAPL'].calculate_lookback_metrics()['return_1W'] == table.loc['AAPL', 'return_1W']
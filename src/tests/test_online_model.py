@@ -0,0 +1,50 @@
+import contextlib
+import io
+from pathlib import Path
+
+import numpy as np
+
+from online_model import IncrementalModel
+from prediction import StockDataProcessor, StockAnalyzer
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+
+def _labeled_rows(ticker):
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = StockDataProcessor(str(DATA_DIR / f'{ticker}.csv'))
+        processor.load_data()
+        processor.clean_data()
+        data = processor.add_technical_indicators(use_adj_close=True)
+    return data.dropna(subset=['10D_Future_Return'])
+
+
+def test_plain_append_updates_without_refit():
+    data = _labeled_rows('META')
+    analyzer = StockAnalyzer(data.iloc[:-5])
+    model = analyzer.build_incremental_model(forecast_period=10, verbose=False)
+
+    action = analyzer.update_prediction_model(data.iloc[-5:], verbose=False)
+
+    assert action == 'update'
+    assert model.last_drift['feature_shift'] < model.drift_threshold
+    assert model.n_refits == 1
+
+
+def test_forest_update_rescales_retained_trees_and_drops_the_oob_score():
+    data = _labeled_rows('META')
+    features = ['RSI', 'Daily_Return', 'Price_ROC_5', 'SMA_20']
+    X, y = data[features].to_numpy(), data['10D_Future_Return'].to_numpy()
+    model = IncrementalModel(n_estimators=20, trees_per_update=5, refit_every=100, drift_threshold=1e9,
+                             error_ratio=1e9).fit(X[:-5], y[:-5])
+    retained = model.model.estimators_[5:]
+    before = np.mean([tree.predict(model.scaler.transform(X)) for tree in retained], axis=0)
+    seen = model.scaler.n_samples_seen_
+
+    assert model.update(X[-5:], y[-5:]) == 'update'
+
+    after = np.mean([tree.predict(model.scaler.transform(X)) for tree in model.model.estimators_[:15]], axis=0)
+    # Trees compare float32 features, so rows within rounding of a threshold may still switch sides
+    assert np.mean(~np.isclose(after, before)) < 0.01
+    assert model.scaler.n_samples_seen_ == seen + 5
+    assert not hasattr(model.model, 'oob_score_')
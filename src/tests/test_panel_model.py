@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from panel_model import PanelModel, normalize_features
+
+
+def _frame(seed, rows=300):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2020-01-01', periods=rows),
+        'RSI': rng.uniform(0, 100, rows),
+        'SMA_20': 100 + rng.normal(0, 5, rows).cumsum(),
+        '10D_Future_Return': rng.normal(0, 0.05, rows)
+    })
+
+
+def test_normalized_rows_do_not_depend_on_later_rows():
+    data = _frame(0)
+    changed = data.copy()
+    changed.loc[200:, ['RSI', 'SMA_20']] *= 10
+
+    before = normalize_features(data, ['RSI', 'SMA_20'])
+    after = normalize_features(changed, ['RSI', 'SMA_20'])
+
+    np.testing.assert_array_equal(before[:200], after[:200])
+    assert np.isnan(before[:19]).all() and np.isfinite(before[19:]).all()
+
+
+def test_backtest_scores_noise_out_of_sample():
+    frames = {'A': _frame(1), 'B': _frame(2)}
+    model = PanelModel(['RSI', 'SMA_20'], n_estimators=20).fit(frames)
+
+    results = model.backtest(frames)
+
+    # A forest scored on its own training rows fits pure noise closely
+    assert all(result['correlation'] < 0.5 for result in results.values())
+    assert set(results) == {'A', 'B'}
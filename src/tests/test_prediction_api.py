@@ -0,0 +1,104 @@
+import threading
+
+import prediction_api
+from columnar_store import convert_csv
+from dataset_manifest import DatasetManifest
+
+
+def test_predict_reports_unknown_tickers_without_predicting(monkeypatch):
+    requested = []
+
+    def predict(tickers):
+        requested.append(tickers)
+        return [], {}
+
+    monkeypatch.setattr(prediction_api.predictor, 'predict', predict)
+    client = prediction_api.app.test_client()
+
+    response = client.post('/predict', json={'tickers': ['../x', 'zzz']})
+
+    assert response.status_code == 200
+    assert response.get_json()['errors'] == {'../X': 'Unknown ticker ../X', 'ZZZ': 'Unknown ticker ZZZ'}
+    assert requested == [[]]
+
+
+def test_predict_answers_repeated_tickers_once():
+    client = prediction_api.app.test_client()
+    single = {p['ticker']: p for p in client.post('/predict', json={'tickers': ['AAPL', 'MSFT']}).get_json()['predictions']}
+
+    response = client.post('/predict', json={'tickers': ['aapl', 'AAPL', 'MSFT', ' msft']})
+
+    assert response.status_code == 200
+    predictions = response.get_json()['predictions']
+    assert [p['ticker'] for p in predictions] == ['AAPL', 'MSFT']
+    for prediction in predictions:
+        assert prediction['predicted_10d_return'] == single[prediction['ticker']]['predicted_10d_return']
+        assert prediction['score'] == single[prediction['ticker']]['score']
+
+
+def test_multi_worker_analysis_loads_through_the_parent_frame_cache():
+    cache = prediction_api.frame_cache
+    cache.invalidate()
+    misses_before = cache.misses
+    first = prediction_api.MarketAnalyzer.generate_market_analysis(workers=2)
+    hits, misses = cache.hits, cache.misses
+
+    second = prediction_api.MarketAnalyzer.generate_market_analysis(workers=2)
+
+    assert misses > misses_before
+    assert cache.misses == misses
+    assert cache.hits > hits
+    assert first == second
+
+
+def test_snapshot_serves_previous_state_during_a_rebuild(monkeypatch):
+    snapshot = prediction_api.AnalysisSnapshot(refresh_interval=60)
+    snapshot.refresh(force=True)
+    previous = snapshot.get()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_analysis(workers=1):
+        started.set()
+        release.wait(5)
+        return {'all_stocks': [], 'recommended': []}
+
+    monkeypatch.setattr(prediction_api.MarketAnalyzer, 'generate_market_analysis', staticmethod(slow_analysis))
+    rebuild = threading.Thread(target=snapshot.refresh, kwargs={'force': True})
+    rebuild.start()
+    try:
+        assert started.wait(5)
+        assert snapshot.get() is previous
+    finally:
+        release.set()
+        rebuild.join()
+    assert snapshot.get()[1] != previous[1]
+
+
+def test_warm_start_leaves_thread_starts_to_the_workers(monkeypatch):
+    monkeypatch.setattr(prediction_api, 'manifest', DatasetManifest(prediction_api.DATA_DIR))
+    monkeypatch.setattr(prediction_api, 'snapshot', prediction_api.AnalysisSnapshot(refresh_interval=60))
+
+    prediction_api.warm_start(build=True)
+
+    assert prediction_api.snapshot.get()[2] == 200
+    assert prediction_api.manifest._thread is None
+    assert prediction_api.snapshot._thread is None
+
+
+def test_history_serves_short_datasets_and_dates_alike_for_both_backends(tmp_path, monkeypatch):
+    rows = ['Date,Open,High,Low,Close,Adj Close,Volume'] + [
+        f'2024-01-0{day},{day},{day},{day},{day},{day},100' for day in range(1, 6)]
+    for ticker in ('SHORT', 'STORED'):
+        (tmp_path / f'{ticker}.csv').write_text('\n'.join(rows) + '\n')
+    assert convert_csv(tmp_path / 'STORED.csv')
+    monkeypatch.setattr(prediction_api, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(prediction_api, 'manifest', DatasetManifest(tmp_path))
+    client = prediction_api.app.test_client()
+
+    csv_response = client.get('/history/SHORT?format=json&start=2024-01-02')
+    stored_response = client.get('/history/STORED?format=json&start=2024-01-02')
+
+    assert csv_response.status_code == stored_response.status_code == 200
+    records = csv_response.get_json()
+    assert [record['Date'] for record in records] == ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+    assert stored_response.get_json() == records